@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#          bench.py - Supporting routines for the benchmark scripts
+#
+################################################################################
+
+import csv
+import functools
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import click
+
+from utils import command_args, finish_profiling, profile_command, start_profiling
+
+# Optional gittuf features, detected once per process
+_gittuf_features = {}
+
+def benchmark_options(func):
+    """Adds the options shared by every benchmark script to a click command
+
+    The profile options are handled here rather than passed on: profiling is
+    started before the benchmark and its summary is printed even if it fails.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, profile_directory, profile_top, **kwargs):
+        if profile_directory != "":
+            start_profiling(profile_directory)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            finish_profiling(profile_top)
+
+    options = [
+        click.option(
+            "--repository-directory", default="",
+            help="The path where the script should store the working copies of the repositories."
+        ),
+        click.option(
+            "--profile-directory", default="",
+            help="Optional path where every gittuf command writes CPU and heap profiles."
+        ),
+        click.option(
+            "--profile-top", default=10, type=int,
+            help="How many of the hottest functions of each gittuf command to print."
+        ),
+        click.option(
+            "--results-file", default="",
+            help="Optional path of a CSV file to write the results to."
+        ),
+        click.option(
+            "--results-database", default="",
+            help="Optional path of a SQLite database to append the results to."
+        ),
+    ]
+    for option in reversed(options):
+        wrapper = option(wrapper)
+    return wrapper
+
+def measure_command(cmd, expected_retcode=0, cwd=None, env=None, prefix=None, profile=False):
+    """Runs the supplied command without terminal output and measures it
+
+    prefix is an optional argument list placed in front of the command, e.g.
+    ["taskset", "-c", "0"]. With profile, a gittuf command writes profiles
+    once utils.start_profiling has been called, so only the commands a
+    benchmark measures are profiled and not its setup.
+    """
+    with tempfile.TemporaryFile() as err:
+        start = time.perf_counter()
+        args = command_args(cmd)
+        if profile:
+            args, _ = profile_command(cmd, args)
+        proc = subprocess.Popen((prefix or []) + args, cwd=cwd, env=env,
+                                stdout=subprocess.DEVNULL, stderr=err)
+        _, status, rusage = os.wait4(proc.pid, 0)
+        elapsed = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if expected_retcode is not None and proc.returncode != expected_retcode:
+            err.seek(0)
+            stderr = err.read().decode("utf-8", errors="replace").strip()
+            raise Exception(
+                f"Expected {expected_retcode} from `{cmd}` but it exited with "
+                f"{proc.returncode}.\n{stderr[-2000:]}"
+            )
+    return {
+        "seconds": elapsed,
+        "max_rss_kb": rusage.ru_maxrss,
+        "retcode": proc.returncode,
+    }
+
+def measure_parallel(jobs, **kwargs):
+    """Runs (cmd, cwd) jobs concurrently and returns the wall time and results
+
+    Any keyword arguments are passed on to measure_command for every job.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(len(jobs), 1)) as pool:
+        futures = [pool.submit(measure_command, cmd, cwd=cwd, **kwargs) for cmd, cwd in jobs]
+        results = [f.result() for f in futures]
+    return time.perf_counter() - start, results
+
+def git_output(args, cwd):
+    """Runs a git command and returns its stripped standard output"""
+    return subprocess.check_output(["git"] + args, cwd=cwd).decode("utf-8").strip()
+
+def configure_signing(repo_dir, key_path, name="gittuf-demo"):
+    """Sets the repository config needed to sign commits with the given key"""
+    measure_command("git config --local gpg.format ssh", cwd=repo_dir)
+    measure_command("git config --local commit.gpgsign true", cwd=repo_dir)
+    measure_command(f"git config --local user.signingkey {key_path}", cwd=repo_dir)
+    measure_command(f"git config --local user.name '{name}'", cwd=repo_dir)
+    measure_command("git config --local user.email gittuf.demo@example.com", cwd=repo_dir)
+
+def init_repository(repo_dir, key_path):
+    """Creates a repository that signs with the given key and accepts pushes"""
+    os.makedirs(repo_dir)
+    measure_command("git init -b main", cwd=repo_dir)
+    configure_signing(repo_dir, key_path)
+    measure_command("git config receive.denyCurrentBranch ignore", cwd=repo_dir)
+
+def init_policy(repo_dir, keys_dir, rules):
+    """Sets up the root of trust and applies a policy with the given rules
+
+    Each rule is a (name, pattern, [public key names]) tuple, e.g.
+    ("protect-main", "git:refs/heads/main", ["developer1"]).
+    """
+    root_key = os.path.join(keys_dir, "root")
+    targets_key = os.path.join(keys_dir, "targets")
+    measure_command(f"gittuf trust init -k {root_key}", cwd=repo_dir)
+    measure_command(
+        f"gittuf trust add-policy-key -k {root_key} --policy-key {targets_key}.pub",
+        cwd=repo_dir,
+    )
+    measure_command(f"gittuf policy init -k {targets_key}", cwd=repo_dir)
+    for name, pattern, authorized in rules:
+        cmd = (
+            "gittuf policy add-rule"
+            f" -k {targets_key}"
+            f" --rule-name '{name}'"
+            f" --rule-pattern {pattern}"
+        )
+        for key in authorized:
+            cmd += f" --authorize-key {os.path.join(keys_dir, key)}.pub"
+        measure_command(cmd, cwd=repo_dir)
+    measure_command("gittuf policy apply", cwd=repo_dir)
+
+def append_rsl_entries(repo_dir, count, branch="main"):
+    """Records count new commits on the branch, each with its own RSL entry"""
+    for i in range(count):
+        measure_command(f"git commit --allow-empty -q -m 'Entry {i + 1}'", cwd=repo_dir)
+        measure_command(f"gittuf rsl record {branch}", cwd=repo_dir)
+
+def generate_history(repo_dir, files, commits, changes_per_commit, file_size, seed=0,
+                     branch="main"):
+    """Writes a synthetic history to a branch with git fast-import
+
+    On a new branch, the first commit adds files files of file_size random
+    bytes. Every other commit rewrites changes_per_commit of them, so an
+    existing branch can be extended with the same files. The commits are not
+    signed, so the branch should be recorded in the RSL afterwards.
+    """
+    rng = random.Random(seed)
+    parent = subprocess.run(
+        ["git", "rev-parse", "--verify", "-q", f"refs/heads/{branch}"],
+        cwd=repo_dir, stdout=subprocess.PIPE, check=False,
+    ).stdout.decode("utf-8").strip()
+    proc = subprocess.Popen(["git", "fast-import", "--quiet"], cwd=repo_dir,
+                            stdin=subprocess.PIPE)
+    for number in range(commits):
+        if number == 0 and not parent:
+            paths = range(files)
+        else:
+            paths = rng.sample(range(files), changes_per_commit)
+        message = f"Synthetic change {number + 1}".encode()
+        proc.stdin.write(
+            f"commit refs/heads/{branch}\n"
+            f"committer gittuf-demo <gittuf.demo@example.com> {1700000000 + number} +0000\n"
+            f"data {len(message)}\n".encode() + message + b"\n"
+        )
+        if number == 0 and parent:
+            proc.stdin.write(f"from {parent}\n".encode())
+        for path in paths:
+            content = rng.randbytes(file_size)
+            proc.stdin.write(
+                f"M 100644 inline files/{path // 100}/{path}.bin\ndata {len(content)}\n".encode()
+                + content + b"\n"
+            )
+    proc.stdin.close()
+    if proc.wait() != 0:
+        raise Exception(f"git fast-import exited with {proc.returncode}.")
+    head = subprocess.run(["git", "symbolic-ref", "-q", "HEAD"], cwd=repo_dir,
+                          stdout=subprocess.PIPE, check=False).stdout.decode("utf-8").strip()
+    if head == f"refs/heads/{branch}":
+        measure_command("git reset -q --hard", cwd=repo_dir)
+
+def directory_bytes(path):
+    """Returns the total size of the files under a directory"""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+        if not os.path.islink(os.path.join(root, name))
+    )
+
+def commit_file(repo_dir, path, content, message):
+    """Writes a file and commits it with the repository's signing key"""
+    with open(os.path.join(repo_dir, path), "w", encoding="utf-8") as fp:
+        fp.write(content)
+    measure_command(f"git add {path}", cwd=repo_dir)
+    measure_command(f"git commit -q -m '{message}'", cwd=repo_dir)
+
+def set_signing_key(repo_dir, key_path):
+    """Sets user.signingkey in the repository's local git config"""
+    measure_command(f"git config --local user.signingkey {key_path}", cwd=repo_dir)
+
+def rsl_length(repo_dir):
+    """Returns the number of entries in the repository's RSL"""
+    return int(git_output(["rev-list", "--count", "refs/gittuf/reference-state-log"], repo_dir))
+
+def time_verification(repo_dir, iterations, ref="main", expected_retcode=0):
+    """Runs verify-ref repeatedly and returns the timing and peak memory"""
+    results = [
+        measure_command(f"gittuf verify-ref {ref}", expected_retcode, cwd=repo_dir, profile=True)
+        for _ in range(iterations)
+    ]
+    stats = summarize([r["seconds"] for r in results])
+    return {
+        "mean_s": stats["mean"],
+        "min_s": stats["min"],
+        "max_s": stats["max"],
+        "max_rss_kb": max(r["max_rss_kb"] for r in results),
+    }
+
+def evict_page_cache(path):
+    """Asks the kernel to drop the cached pages of a file or directory tree
+
+    Dropping all caches needs root, but any process may advise the kernel that
+    it no longer needs the clean pages of files it can open.
+    """
+    paths = [path]
+    if os.path.isdir(path):
+        paths = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+    for file_path in paths:
+        if os.path.islink(file_path):
+            continue
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+# Why time_verification_modes has no cached timings on a binary without the cache
+NO_CACHE_REASON = "skipped, this gittuf binary has no persistent verification cache"
+
+def gittuf_supports_cache():
+    """Returns whether the gittuf binary has a persistent verification cache"""
+    if "cache" not in _gittuf_features:
+        result = measure_command("gittuf cache --help", expected_retcode=None)
+        _gittuf_features["cache"] = result["retcode"] == 0
+    return _gittuf_features["cache"]
+
+def time_verification_modes(cmd, repo_dir, expected_retcode, iterations, env=None):
+    """Times a verification command cold, warm and with gittuf's cache
+
+    Cold runs use a copy of the repository on new inodes whose pages, and the
+    gittuf binary's, are evicted from the page cache. Warm runs repeat the
+    command in the repository itself. Cached runs first persist gittuf's
+    verification cache in a copy. If gittuf has no such cache, they are None
+    and cached_skipped says why.
+    """
+    copy_dir = f"{repo_dir.rstrip(os.sep)}-verify-timing"
+    binary = command_args("gittuf")[0]
+
+    def fresh_copy():
+        if os.path.exists(copy_dir):
+            shutil.rmtree(copy_dir)
+        shutil.copytree(repo_dir, copy_dir, symlinks=True, copy_function=shutil.copyfile)
+        return copy_dir
+
+    cold = []
+    for _ in range(iterations):
+        evict_page_cache(fresh_copy())
+        evict_page_cache(shutil.which(binary) or binary)
+        cold.append(measure_command(cmd, expected_retcode, cwd=copy_dir, env=env)["seconds"])
+
+    measure_command(cmd, expected_retcode, cwd=repo_dir, env=env)
+    warm = [
+        measure_command(cmd, expected_retcode, cwd=repo_dir, env=env)["seconds"]
+        for _ in range(iterations)
+    ]
+
+    cached = None
+    skipped = NO_CACHE_REASON
+    if gittuf_supports_cache():
+        skipped = ""
+        measure_command("gittuf cache init", cwd=fresh_copy(), env=env)
+        cached = summarize([
+            measure_command(cmd, expected_retcode, cwd=copy_dir, env=env)["seconds"]
+            for _ in range(iterations)
+        ])["mean"]
+    if os.path.exists(copy_dir):
+        shutil.rmtree(copy_dir)
+
+    return {
+        "cold_s": summarize(cold)["mean"],
+        "warm_s": summarize(warm)["mean"],
+        "cached_s": cached,
+        "cached_skipped": skipped,
+    }
+
+def summarize(samples):
+    """Returns the mean, minimum, maximum and standard deviation of samples"""
+    return {
+        "mean": statistics.mean(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+def print_table(columns, rows):
+    """Prints rows of results as an aligned plain-text table"""
+    cells = [[_format_cell(row[c]) for c in columns] for row in rows]
+    widths = [max([len(c)] + [len(r[i]) for r in cells]) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for r in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)))
+
+def write_csv(path, columns, rows):
+    """Writes rows of results to a CSV file"""
+    with open(path, "w", encoding="utf-8", newline="") as fp:
+        writer = csv.DictWriter(fp, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+def print_bar_chart(title, labels, values, unit="", width=50):
+    """Prints a horizontal bar chart of values in the terminal"""
+    print(f"\n{title}")
+    peak = max(values) if values and max(values) > 0 else 1
+    label_width = max(len(str(label)) for label in labels)
+    for label, value in zip(labels, values):
+        bar = "#" * max(int(round(width * value / peak)), 1 if value > 0 else 0)
+        print(f"  {str(label).rjust(label_width)} | {bar} {value:.2f}{unit}")
+
+def parse_int_list(value):
+    """Parses a comma-separated option value such as "100,1000" """
+    return [int(v) for v in value.split(",") if v.strip()]
+
+def _format_cell(value):
+    if isinstance(value, float):
+        return f"{value:.4f}"
+    return str(value)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#      benchmark1.py - The gittuf NDSS Artifact Evaluation Benchmark, pt. 1
+#
+#   This script compares the lightweight RSL divergence pre-check with a full
+#   `gittuf rsl remote pull` on increasingly long RSLs.
+#
+################################################################################
+
+import os
+import shutil
+import time
+import click
+
+from bench import (
+    append_rsl_entries, benchmark_options, init_policy, init_repository, measure_command,
+    parse_int_list, print_table, summarize, write_csv,
+)
+from results import record_run
+from rsl_precheck import check_rsl_divergence, BEHIND, DIVERGED
+from utils import check_binaries, prepare_workspace, print_section
+
+REQUIRED_BINARIES = ["git", "gittuf", "ssh-keygen"]
+
+COLUMNS = ["rsl_entries", "path", "status", "mean_s", "min_s", "max_s", "speedup"]
+
+def time_precheck(seed_dir, trial_dir, expected_status):
+    """Times the pre-check on a fresh copy of the seed clone"""
+    shutil.copytree(seed_dir, trial_dir, symlinks=True)
+    start = time.perf_counter()
+    status, _, _ = check_rsl_divergence(trial_dir, "origin")
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(trial_dir)
+    if status != expected_status:
+        raise Exception(f"Expected pre-check to report {expected_status} but got {status}.")
+    return elapsed
+
+def time_pull(seed_dir, trial_dir, expected_retcode):
+    """Times a full RSL pull on a fresh copy of the seed clone"""
+    shutil.copytree(seed_dir, trial_dir, symlinks=True)
+    result = measure_command("gittuf rsl remote pull origin", expected_retcode, cwd=trial_dir,
+                             profile=True)
+    shutil.rmtree(trial_dir)
+    return result["seconds"]
+
+def result_rows(length, status, precheck_samples, pull_samples):
+    """Builds the result rows for one RSL length"""
+    precheck = summarize(precheck_samples)
+    pull = summarize(pull_samples)
+    return [
+        {
+            "rsl_entries": length, "path": "pre-check", "status": status,
+            "mean_s": precheck["mean"], "min_s": precheck["min"], "max_s": precheck["max"],
+            "speedup": pull["mean"] / precheck["mean"],
+        },
+        {
+            "rsl_entries": length, "path": "rsl remote pull", "status": status,
+            "mean_s": pull["mean"], "min_s": pull["min"], "max_s": pull["max"],
+            "speedup": 1.0,
+        },
+    ]
+
+@click.command()
+@benchmark_options
+@click.option(
+    "--rsl-lengths", default="100,1000",
+    help="Comma-separated RSL lengths (number of entries) to benchmark."
+)
+@click.option(
+    "--iterations", default=5, type=int,
+    help="How many times each path is timed for every RSL length."
+)
+def benchmark1(repository_directory, rsl_lengths, iterations, results_file, results_database):
+    """Benchmark 1 for NDSS Artifact Evaluation"""
+
+    print("gittuf NDSS Artifact Evaluation - Benchmark 1")
+
+    print_section("[1 / 3] Repository Setup")
+
+    working_dir, keys_dir, _tmp_dir = prepare_workspace(repository_directory)
+    server_dir = os.path.join(working_dir, "repo_server")
+    trial_dir = os.path.join(working_dir, "trial")
+
+    init_repository(server_dir, os.path.join(keys_dir, "authorized"))
+    init_policy(server_dir, keys_dir, [
+        ("protect-main", "git:refs/heads/main", ["authorized", "developer1", "developer2"]),
+    ])
+    print(f"Created {server_dir} with a policy protecting main")
+
+    print_section("[2 / 3] Pre-check Versus Full Pull")
+
+    rows = []
+    recorded = 0
+    for length in sorted(parse_int_list(rsl_lengths)):
+        print(f"\nExtending the server RSL to {length} entries...")
+        append_rsl_entries(server_dir, length - recorded)
+        recorded = length
+
+        # The seed clone is one entry behind the server, as a clone would be
+        # right before fetching a fresh push
+        seed_dir = os.path.join(working_dir, f"seed_{length}")
+        measure_command(f"gittuf clone {server_dir} {seed_dir}", cwd=working_dir)
+        append_rsl_entries(server_dir, 1)
+        recorded += 1
+
+        precheck_samples = []
+        pull_samples = []
+        for _ in range(iterations):
+            precheck_samples.append(time_precheck(seed_dir, trial_dir, BEHIND))
+            pull_samples.append(time_pull(seed_dir, trial_dir, 0))
+        rows.extend(result_rows(length, BEHIND, precheck_samples, pull_samples))
+        print_table(COLUMNS, rows[-2:])
+
+    print_section("[3 / 3] Divergence Detection")
+
+    # Reproduce experiment 3: the server drops the latest entry and then
+    # accepts a different one, so a clone holding the dropped entry diverges
+    victim_dir = os.path.join(working_dir, "victim")
+    measure_command(f"gittuf clone {server_dir} {victim_dir}", cwd=working_dir)
+    measure_command("git reset -q --hard HEAD~1", cwd=server_dir)
+    measure_command(
+        "git update-ref refs/gittuf/reference-state-log refs/gittuf/reference-state-log~1",
+        cwd=server_dir,
+    )
+    append_rsl_entries(server_dir, 1)
+
+    precheck_samples = []
+    pull_samples = []
+    for _ in range(iterations):
+        precheck_samples.append(time_precheck(victim_dir, trial_dir, DIVERGED))
+        pull_samples.append(time_pull(victim_dir, trial_dir, 1))
+    rows.extend(result_rows(recorded, DIVERGED, precheck_samples, pull_samples))
+
+    print()
+    print_table(COLUMNS, rows)
+    if results_file != "":
+        write_csv(results_file, COLUMNS, rows)
+        print(f"\nResults written to {results_file}")
+    if results_database != "":
+        run_id = record_run(results_database, "benchmark1", {
+            "rsl_lengths": rsl_lengths,
+            "iterations": iterations,
+        }, rows, ["rsl_entries", "path", "status"])
+        print(f"\nResults recorded as run {run_id} in {results_database}")
+
+if __name__ == "__main__":
+    check_binaries(REQUIRED_BINARIES)
+    benchmark1() # pylint: disable=no-value-for-parameter
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#      benchmark10.py - The gittuf NDSS Artifact Evaluation Benchmark, pt. 10
+#
+#   This script builds a tree of mirrors, from an upstream repository through
+#   regional mirrors and build caches to developer clones, and measures how
+#   long a new RSL entry takes to reach every tier, and how long it takes
+#   until a mirror that drops an entry, as in experiment 3, is noticed.
+#
+################################################################################
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import click
+
+from bench import (
+    append_rsl_entries, benchmark_options, configure_signing, init_policy, init_repository,
+    measure_command, parse_int_list, print_table, summarize, write_csv,
+)
+from results import record_run
+from utils import check_binaries, prepare_workspace, print_section
+
+REQUIRED_BINARIES = ["git", "gittuf", "ssh-keygen"]
+
+TIER_NAMES = ["upstream", "regional", "cache", "developer"]
+
+COLUMNS = ["phase", "tier", "nodes", "sync_s", "cumulative_s", "failed_syncs"]
+
+SYNC_MODES = ["pull", "push"]
+
+def tier_name(tier):
+    """Returns a readable name for a tier of the mirror tree"""
+    return TIER_NAMES[tier] if tier < len(TIER_NAMES) else f"tier{tier}"
+
+def build_tree(upstream_dir, working_dir, fanouts, sync_mode):
+    """Clones every tier from the one above it and returns the node directories
+
+    Nodes are returned per tier, each as a (directory, parent index) tuple.
+    """
+    tiers = [[(upstream_dir, None)]]
+    for tier, fanout in enumerate(fanouts, 1):
+        nodes = []
+        for parent_index, (parent_dir, _) in enumerate(tiers[-1]):
+            for k in range(fanout):
+                node_dir = os.path.join(working_dir, f"{tier_name(tier)}_{len(nodes)}")
+                measure_command(f"gittuf clone {parent_dir} {node_dir}", cwd=working_dir)
+                if sync_mode == "push":
+                    measure_command("git config receive.denyCurrentBranch ignore", cwd=node_dir)
+                    measure_command(f"git remote add child{k} {node_dir}", cwd=parent_dir)
+                nodes.append((node_dir, parent_index))
+        tiers.append(nodes)
+    return tiers
+
+def sync_node(tiers, tier, index, sync_mode):
+    """Brings a node up to date with its parent and returns whether that worked
+
+    In pull mode the node pulls from its parent, in push mode the parent pushes
+    to the node. The RSL is synced first, so a diverged RSL stops the sync
+    before any branch is updated.
+    """
+    node_dir, parent_index = tiers[tier][index]
+    if sync_mode == "pull":
+        commands = [
+            ("gittuf rsl remote pull origin", node_dir),
+            ("git pull -q --ff-only origin main", node_dir),
+        ]
+    else:
+        parent_dir = tiers[tier - 1][parent_index][0]
+        siblings = [i for i, (_, p) in enumerate(tiers[tier]) if p == parent_index]
+        remote = f"child{siblings.index(index)}"
+        commands = [
+            (f"gittuf rsl remote push {remote}", parent_dir),
+            (f"git push -q {remote} main", parent_dir),
+        ]
+    for cmd, cwd in commands:
+        if measure_command(cmd, expected_retcode=None, cwd=cwd, profile=True)["retcode"] != 0:
+            return False
+    return True
+
+def sync_tiers(tiers, first_tier, sync_mode, only=None):
+    """Syncs tiers in order, all nodes of a tier at once, and times each tier
+
+    only optionally limits every tier to the given node indexes.
+    """
+    results = []
+    for tier in range(first_tier, len(tiers)):
+        indexes = only[tier] if only else range(len(tiers[tier]))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(len(indexes), 1)) as pool:
+            synced = list(pool.map(lambda i, t=tier: sync_node(tiers, t, i, sync_mode), indexes))
+        results.append({
+            "tier": tier,
+            "nodes": len(indexes),
+            "sync_s": time.perf_counter() - start,
+            "failed_syncs": synced.count(False),
+        })
+    return results
+
+def descendants(tiers, tier, index):
+    """Returns the node indexes below a node, per tier"""
+    below = {tier: [index]}
+    for t in range(tier + 1, len(tiers)):
+        below[t] = [i for i, (_, p) in enumerate(tiers[t]) if p in below[t - 1]]
+    return below
+
+@click.command()
+@benchmark_options
+@click.option(
+    "--fanouts", default="2,2,2",
+    help="Comma-separated number of children of every node in each tier below upstream."
+)
+@click.option(
+    "--sync-mode", default="pull", type=click.Choice(SYNC_MODES),
+    help="Whether nodes pull from their parent or parents push to their children."
+)
+@click.option(
+    "--tamper-tier", default=1, type=int,
+    help="The tier of the mirror that drops an RSL entry."
+)
+@click.option(
+    "--rsl-length", default=100, type=int,
+    help="Number of RSL entries upstream before the mirrors are cloned."
+)
+@click.option(
+    "--iterations", default=3, type=int,
+    help="How many new entries are propagated through the tree."
+)
+def benchmark10(repository_directory, fanouts, sync_mode, tamper_tier, rsl_length, iterations,
+                results_file, results_database):
+    """Benchmark 10 for NDSS Artifact Evaluation"""
+
+    print("gittuf NDSS Artifact Evaluation - Benchmark 10")
+    counts = parse_int_list(fanouts)
+    # The tampering mirror needs mirrors below it to detect anything
+    if not 1 <= tamper_tier < len(counts):
+        raise click.BadParameter(f"no mirror tier {tamper_tier} with mirrors below it",
+                                 param_hint="--tamper-tier")
+
+    print_section("[1 / 4] Mirror Tree Setup")
+
+    working_dir, keys_dir, _tmp_dir = prepare_workspace(repository_directory)
+    upstream_dir = os.path.join(working_dir, "upstream")
+
+    init_repository(upstream_dir, os.path.join(keys_dir, "authorized"))
+    init_policy(upstream_dir, keys_dir, [
+        ("protect-main", "git:refs/heads/main", ["authorized"]),
+    ])
+    append_rsl_entries(upstream_dir, rsl_length)
+    tiers = build_tree(upstream_dir, working_dir, counts, sync_mode)
+    print(f"Created a mirror tree with {' -> '.join(str(len(t)) for t in tiers)} nodes "
+          f"per tier, syncing by {sync_mode}")
+
+    print_section("[2 / 4] Propagation")
+
+    samples = []
+    for _ in range(iterations):
+        append_rsl_entries(upstream_dir, 1)
+        samples.append(sync_tiers(tiers, 1, sync_mode))
+        failed = sum(r["failed_syncs"] for r in samples[-1])
+        if failed:
+            raise Exception(f"{failed} mirrors failed to sync a valid RSL entry.")
+
+    rows = []
+    cumulative = 0.0
+    for tier_results in zip(*samples):
+        sync_s = summarize([r["sync_s"] for r in tier_results])["mean"]
+        cumulative += sync_s
+        rows.append({
+            "phase": "propagation",
+            "tier": tier_name(tier_results[0]["tier"]),
+            "nodes": tier_results[0]["nodes"],
+            "sync_s": sync_s,
+            "cumulative_s": cumulative,
+            "failed_syncs": 0,
+        })
+    print_table(COLUMNS, rows)
+
+    print_section("[3 / 4] Detection")
+
+    # As in experiment 3, a mirror drops the latest entry, which all of its
+    # descendants already have, and then accepts a different one
+    tamper_dir = tiers[tamper_tier][0][0]
+    configure_signing(tamper_dir, os.path.join(keys_dir, "authorized"))
+    measure_command("git reset -q --hard HEAD~1", cwd=tamper_dir)
+    measure_command(
+        "git update-ref refs/gittuf/reference-state-log refs/gittuf/reference-state-log~1",
+        cwd=tamper_dir,
+    )
+    append_rsl_entries(tamper_dir, 1)
+    print(f"{os.path.basename(tamper_dir)} dropped an RSL entry and recorded a different one")
+
+    below = descendants(tiers, tamper_tier, 0)
+    detection = sync_tiers(tiers, tamper_tier + 1, sync_mode, only=below)
+    cumulative = 0.0
+    detected_after = None
+    for result in detection:
+        cumulative += result["sync_s"]
+        if result["failed_syncs"] and detected_after is None:
+            detected_after = cumulative
+        rows.append({
+            "phase": "detection",
+            "tier": tier_name(result["tier"]),
+            "nodes": result["nodes"],
+            "sync_s": result["sync_s"],
+            "cumulative_s": cumulative,
+            "failed_syncs": result["failed_syncs"],
+        })
+    print_table(COLUMNS, rows[-len(detection):])
+
+    print_section("[4 / 4] Summary")
+
+    print_table(COLUMNS, rows)
+    propagation = [r for r in rows if r["phase"] == "propagation"]
+    print(f"\nA new RSL entry reaches the {propagation[-1]['tier']} tier after "
+          f"{propagation[-1]['cumulative_s']:.4f}s")
+    if detected_after is None:
+        print("The dropped RSL entry was not detected by any mirror below the tampering one")
+    else:
+        print(f"The dropped RSL entry was detected {detected_after:.4f}s after the tampering "
+              f"mirror's children started to sync")
+
+    if results_file != "":
+        write_csv(results_file, COLUMNS, rows)
+        print(f"\nResults written to {results_file}")
+    if results_database != "":
+        run_id = record_run(results_database, "benchmark10", {
+            "fanouts": fanouts,
+            "sync_mode": sync_mode,
+            "tamper_tier": tamper_tier,
+            "rsl_length": rsl_length,
+            "iterations": iterations,
+        }, rows, ["phase", "tier"])
+        print(f"\nResults recorded as run {run_id} in {results_database}")
+
+if __name__ == "__main__":
+    check_binaries(REQUIRED_BINARIES)
+    benchmark10() # pylint: disable=no-value-for-parameter
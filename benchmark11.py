@@ -0,0 +1,399 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#      benchmark11.py - The gittuf NDSS Artifact Evaluation Benchmark, pt. 11
+#
+#   This script generates long, seeded sequences of mixed policy and RSL
+#   operations across the identities in keys/, runs them against gittuf, and
+#   checks verify-ref against the verdict expected from a simple policy
+#   model. It reports the throughput of every kind of operation along with
+#   any verdict that does not match the model.
+#
+################################################################################
+
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import click
+
+from bench import (
+    benchmark_options, git_output, init_policy, init_repository, measure_command, print_table,
+    summarize, write_csv,
+)
+from results import record_run
+from utils import check_binaries, prepare_workspace, print_section
+
+REQUIRED_BINARIES = ["git", "gittuf", "ssh-keygen"]
+
+COLUMNS = ["operation", "count", "mean_s", "max_s", "ops_per_s", "failed", "mismatches"]
+
+# Everyone who commits, records and annotates. unauthorized is never added to
+# the policy, developer1 is never removed from it, so the delegation it signs
+# stays trusted, and the others are authorized and revoked at random.
+ACTORS = ["authorized", "developer1", "developer2", "developer3", "unauthorized"]
+DELEGATOR = "developer1"
+CANDIDATES = ["authorized", "developer2", "developer3"]
+DELEGATES = ["developer2", "developer3"]
+
+# Share of the changes made by someone the applied policy authorizes
+AUTHORIZED_SHARE = 0.9
+
+# Relative weights of the operations, among those possible at each point
+WEIGHTS = {
+    "commit": 50,
+    "skip": 40,
+    "authorize": 6,
+    "revoke": 6,
+    "threshold": 4,
+    "delegate": 4,
+    "undelegate": 3,
+    "apply": 12,
+}
+
+def new_model():
+    """Returns the policy model of a repository set up by setup_workload
+
+    The model keeps the staged and the applied protect-main rule, and whether
+    every RSL entry for main was authorized by the policy applied when it was
+    recorded.
+    """
+    policy = {"keys": ["authorized", "developer1"], "threshold": 1, "delegate": None}
+    return {
+        "staged": dict(policy),
+        "applied": dict(policy),
+        "delegation_initialized": False,
+        "entries": [True],
+        "skipped": set(),
+    }
+
+def signer_authorized(policy, signer):
+    """Returns whether a single signature by signer satisfies the policy for main
+
+    The benchmark never collects further approvals, so a threshold above one
+    is never met. A threshold above one is also never staged once delegated
+    metadata exists, see possible_operations, so a delegate always counts.
+    """
+    if policy["threshold"] != 1:
+        return False
+    return signer in policy["keys"] or signer == policy["delegate"]
+
+def expected_verdict(model):
+    """Returns whether verify-ref main is expected to pass"""
+    return all(valid for i, valid in enumerate(model["entries"]) if i not in model["skipped"])
+
+def possible_operations(model, rng):
+    """Returns every operation the model allows next, as operation dicts
+
+    Only unauthorized entries before the latest one are skipped, so main's
+    tip always matches an entry that is not skipped.
+    """
+    staged = model["staged"]
+    signers = [a for a in ACTORS if signer_authorized(model["applied"], a)]
+    # Most changes come from someone the policy authorizes, the rest from anyone
+    committer = rng.choice(signers if signers and rng.random() < AUTHORIZED_SHARE else ACTORS)
+    operations = [{
+        "op": "commit",
+        "committer": committer,
+        # Now and then someone else records another person's change
+        "recorder": committer if rng.random() < 0.8 else rng.choice(ACTORS),
+    }]
+    skippable = [i for i in range(len(model["entries"]) - 1)
+                 if i not in model["skipped"] and not model["entries"][i]]
+    if skippable and signers:
+        operations.append({
+            "op": "skip",
+            "entry": rng.choice(skippable),
+            "signer": rng.choice(signers),
+        })
+    grantable = [k for k in CANDIDATES if k not in staged["keys"]]
+    if grantable:
+        operations.append({"op": "authorize", "key": rng.choice(grantable)})
+    revocable = [k for k in CANDIDATES if k in staged["keys"]]
+    if revocable and len(staged["keys"]) - 1 >= staged["threshold"]:
+        operations.append({"op": "revoke", "key": rng.choice(revocable)})
+    # Delegated metadata must meet the threshold of the rule that delegates,
+    # and developer1 signs it alone. It stays in the policy after its rule is
+    # removed, so a threshold of two is only possible before the first delegation
+    threshold = 3 - staged["threshold"]
+    if threshold <= len(staged["keys"]) and (
+            threshold == 1 or not model["delegation_initialized"]):
+        operations.append({"op": "threshold", "threshold": threshold})
+    if staged["delegate"] is None and staged["threshold"] == 1:
+        operations.append({
+            "op": "delegate",
+            "key": rng.choice(DELEGATES),
+            "init": not model["delegation_initialized"],
+        })
+    elif staged["delegate"] is not None:
+        operations.append({"op": "undelegate"})
+    if staged != model["applied"]:
+        operations.append({"op": "apply"})
+    return operations
+
+def apply_operation(model, operation):
+    """Updates the model with the effect of an operation"""
+    staged = model["staged"]
+    if operation["op"] == "commit":
+        model["entries"].append(signer_authorized(model["applied"], operation["recorder"]))
+    elif operation["op"] == "skip":
+        model["skipped"].add(operation["entry"])
+    elif operation["op"] == "authorize":
+        staged["keys"] = sorted(staged["keys"] + [operation["key"]])
+    elif operation["op"] == "revoke":
+        staged["keys"] = [k for k in staged["keys"] if k != operation["key"]]
+    elif operation["op"] == "threshold":
+        staged["threshold"] = operation["threshold"]
+    elif operation["op"] == "delegate":
+        staged["delegate"] = operation["key"]
+        model["delegation_initialized"] = True
+    elif operation["op"] == "undelegate":
+        staged["delegate"] = None
+    elif operation["op"] == "apply":
+        model["applied"] = dict(staged)
+
+def generate_workload(seed, count):
+    """Returns count seeded operations, each with the verdict expected after it"""
+    rng = random.Random(seed)
+    model = new_model()
+    workload = []
+    for _ in range(count):
+        operations = possible_operations(model, rng)
+        operation = rng.choices(operations, [WEIGHTS[o["op"]] for o in operations])[0]
+        apply_operation(model, operation)
+        operation["expected"] = expected_verdict(model)
+        workload.append(operation)
+    return workload
+
+def rule_command(keys_dir, policy):
+    """Returns the command that sets protect-main to the given keys and threshold"""
+    cmd = (
+        "gittuf policy update-rule"
+        f" -k {os.path.join(keys_dir, 'targets')}"
+        " --rule-name 'protect-main'"
+        " --rule-pattern git:refs/heads/main"
+        f" --threshold {policy['threshold']}"
+    )
+    for key in policy["keys"]:
+        cmd += f" --authorize-key {os.path.join(keys_dir, key)}.pub"
+    return cmd
+
+def operation_commands(operation, keys_dir, policy, entry_ids, number):
+    """Returns the commands that carry out an operation
+
+    policy is the staged protect-main rule after the operation.
+    """
+    def signing(name):
+        return f"git config --local user.signingkey {os.path.join(keys_dir, name)}"
+
+    delegator_key = os.path.join(keys_dir, DELEGATOR)
+    if operation["op"] == "commit":
+        return [
+            f"git -c user.signingkey={os.path.join(keys_dir, operation['committer'])} "
+            f"commit -q -a -m 'Change {number}'",
+            signing(operation["recorder"]),
+            "gittuf rsl record main",
+        ]
+    if operation["op"] == "skip":
+        return [
+            signing(operation["signer"]),
+            f"gittuf rsl annotate --skip -m 'Skip entry {operation['entry']}' "
+            f"{entry_ids[operation['entry']]}",
+        ]
+    if operation["op"] in ("authorize", "revoke", "threshold"):
+        return [rule_command(keys_dir, policy)]
+    if operation["op"] == "delegate":
+        commands = [f"gittuf policy init -k {delegator_key} --policy-name protect-main"]
+        return (commands if operation["init"] else []) + [
+            "gittuf policy add-rule"
+            f" -k {delegator_key}"
+            " --policy-name protect-main"
+            " --rule-name 'protect-main-delegated'"
+            " --rule-pattern git:refs/heads/main"
+            f" --authorize-key {os.path.join(keys_dir, operation['key'])}.pub"
+        ]
+    if operation["op"] == "undelegate":
+        return [
+            "gittuf policy remove-rule"
+            f" -k {delegator_key}"
+            " --policy-name protect-main"
+            " --rule-name 'protect-main-delegated'"
+        ]
+    return ["gittuf policy apply"]
+
+def setup_workload(repo_dir, keys_dir):
+    """Creates the repository every workload starts from, as new_model describes it"""
+    init_repository(repo_dir, os.path.join(keys_dir, "authorized"))
+    init_policy(repo_dir, keys_dir, [
+        ("protect-main", "git:refs/heads/main", ["authorized", "developer1"]),
+    ])
+    with open(os.path.join(repo_dir, "README.md"), "w", encoding="utf-8") as fp:
+        fp.write("Change 0\n")
+    measure_command("git add README.md", cwd=repo_dir)
+    measure_command("git commit -q -m 'Change 0'", cwd=repo_dir)
+    measure_command("gittuf rsl record main", cwd=repo_dir)
+    return [git_output(["rev-parse", "refs/gittuf/reference-state-log"], repo_dir)]
+
+def run_workload(repo_dir, keys_dir, workload, verify_every):
+    """Runs a workload and checks verify-ref against the model along the way
+
+    Returns the timing of every operation and verification, and every
+    mismatch. An operation that fails is a mismatch too, as the model expects
+    all of them to succeed, and the verdicts after it may then disagree.
+    """
+    entry_ids = setup_workload(repo_dir, keys_dir)
+    model = new_model()
+    results = {"operations": [], "verifications": [], "mismatches": []}
+    for number, operation in enumerate(workload, 1):
+        apply_operation(model, operation)
+        if operation["op"] == "commit":
+            with open(os.path.join(repo_dir, "README.md"), "w", encoding="utf-8") as fp:
+                fp.write(f"Change {number}\n")
+        seconds = 0.0
+        failed = False
+        for cmd in operation_commands(operation, keys_dir, model["staged"], entry_ids, number):
+            result = measure_command(cmd, expected_retcode=None, cwd=repo_dir, profile=True)
+            seconds += result["seconds"]
+            if result["retcode"] != 0:
+                failed = True
+                break
+        if operation["op"] == "commit":
+            entry_ids.append(None if failed else
+                             git_output(["rev-parse", "refs/gittuf/reference-state-log"],
+                                        repo_dir))
+        results["operations"].append((operation["op"], seconds, failed))
+        if failed:
+            results["mismatches"].append({
+                "operation": number, "op": operation["op"], "expected": "success",
+                "actual": "failure",
+            })
+
+        if number % verify_every == 0 or number == len(workload):
+            result = measure_command("gittuf verify-ref main", expected_retcode=None, cwd=repo_dir,
+                                     profile=True)
+            passed = result["retcode"] == 0
+            results["verifications"].append((result["seconds"], passed != operation["expected"]))
+            if passed != operation["expected"]:
+                results["mismatches"].append({
+                    "operation": number, "op": "verify-ref",
+                    "expected": "pass" if operation["expected"] else "fail",
+                    "actual": "pass" if passed else "fail",
+                })
+    return results
+
+def summary_row(name, samples, failed, mismatches):
+    """Returns the results row of one kind of operation"""
+    stats = summarize(samples)
+    return {
+        "operation": name,
+        "count": len(samples),
+        "mean_s": stats["mean"],
+        "max_s": stats["max"],
+        "ops_per_s": len(samples) / sum(samples),
+        "failed": failed,
+        "mismatches": mismatches,
+    }
+
+@click.command()
+@benchmark_options
+@click.option(
+    "--seed", default=0, type=int,
+    help="Seed of the first workload, the others use the following seeds."
+)
+@click.option(
+    "--operations", default=500, type=int,
+    help="How many operations every workload runs."
+)
+@click.option(
+    "--workloads", default=4, type=int,
+    help="How many workloads run, each on its own repository."
+)
+@click.option(
+    "--jobs", default=os.cpu_count(), type=int,
+    help="How many workloads run at the same time."
+)
+@click.option(
+    "--verify-every", default=10, type=int,
+    help="How many operations run between checks of verify-ref against the model."
+)
+@click.option(
+    "--workload-file", default="",
+    help="Optional path of a JSON Lines file to write the generated operations to."
+)
+def benchmark11(repository_directory, seed, operations, workloads, jobs, verify_every,
+                workload_file, results_file, results_database):
+    """Benchmark 11 for NDSS Artifact Evaluation"""
+
+    print("gittuf NDSS Artifact Evaluation - Benchmark 11")
+
+    print_section("[1 / 3] Workload Generation")
+
+    generated = [generate_workload(seed + k, operations) for k in range(workloads)]
+    counts = {}
+    for workload in generated:
+        for operation in workload:
+            counts[operation["op"]] = counts.get(operation["op"], 0) + 1
+    print(f"Generated {workloads} workloads of {operations} operations from seed {seed}: "
+          + ", ".join(f"{counts[name]} {name}" for name in WEIGHTS if name in counts))
+    if workload_file != "":
+        with open(workload_file, "w", encoding="utf-8") as fp:
+            for k, workload in enumerate(generated):
+                for number, operation in enumerate(workload, 1):
+                    fp.write(json.dumps({"workload": k, "operation": number, **operation}) + "\n")
+        print(f"Operations written to {workload_file}")
+
+    print_section("[2 / 3] Workload Execution")
+
+    working_dir, keys_dir, _tmp_dir = prepare_workspace(repository_directory)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(min(jobs, workloads), 1)) as pool:
+        results = list(pool.map(
+            lambda k: run_workload(os.path.join(working_dir, f"workload_{k}"), keys_dir,
+                                   generated[k], verify_every),
+            range(workloads),
+        ))
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    for name in WEIGHTS:
+        timings = [(s, f) for r in results for op, s, f in r["operations"] if op == name]
+        if timings:
+            failed = sum(f for _, f in timings)
+            rows.append(summary_row(name, [s for s, _ in timings], failed, failed))
+    verifications = [v for r in results for v in r["verifications"]]
+    mismatched = sum(m for _, m in verifications)
+    rows.append(summary_row("verify-ref", [s for s, _ in verifications], 0, mismatched))
+    print_table(COLUMNS, rows)
+
+    print_section("[3 / 3] Summary")
+
+    total = workloads * operations
+    print(f"Ran {total} operations and {len(verifications)} verifications in {elapsed:.2f}s, "
+          f"{total / elapsed:.1f} operations per second")
+    mismatches = [dict(m, workload=k) for k, r in enumerate(results) for m in r["mismatches"]]
+    if mismatches:
+        print(f"\n{len(mismatches)} results did not match the policy model:")
+        print_table(["workload", "operation", "op", "expected", "actual"], mismatches[:20])
+        if len(mismatches) > 20:
+            print(f"... and {len(mismatches) - 20} more")
+    else:
+        print("\nEvery operation succeeded and every verdict matched the policy model")
+
+    if results_file != "":
+        write_csv(results_file, COLUMNS, rows)
+        print(f"\nResults written to {results_file}")
+    if results_database != "":
+        run_id = record_run(results_database, "benchmark11", {
+            "seed": seed,
+            "operations": operations,
+            "workloads": workloads,
+            "jobs": jobs,
+            "verify_every": verify_every,
+        }, rows, ["operation"])
+        print(f"\nResults recorded as run {run_id} in {results_database}")
+
+if __name__ == "__main__":
+    check_binaries(REQUIRED_BINARIES)
+    benchmark11() # pylint: disable=no-value-for-parameter
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#      benchmark2.py - The gittuf NDSS Artifact Evaluation Benchmark, pt. 2
+#
+#   This script measures how verification scales with the number of skip
+#   annotations left behind by incident response, as in experiment 4.
+#
+################################################################################
+
+import os
+import click
+
+from bench import (
+    benchmark_options, commit_file, git_output, init_policy, init_repository, measure_command,
+    parse_int_list, print_table, rsl_length, set_signing_key, time_verification, write_csv,
+)
+from results import record_run
+from utils import check_binaries, prepare_workspace, print_section
+
+REQUIRED_BINARIES = ["git", "gittuf", "ssh-keygen"]
+
+COLUMNS = [
+    "annotations", "distance", "rsl_entries", "mean_s", "min_s", "max_s", "max_rss_kb",
+]
+
+def record_valid_change(repo_dir, number):
+    """Makes an authorized change to main and records it in the RSL"""
+    commit_file(repo_dir, "README.md", f"Valid change {number}\n", f"Valid change {number}")
+    measure_command("gittuf rsl record main", cwd=repo_dir)
+
+def inject_incident(repo_dir, keys_dir, number, check=False):
+    """Records an unauthorized change and recovers from it as in experiment 4
+
+    The RSL entry, not only the commit, is signed with the unauthorized key,
+    so the incident is a policy violation. With check, verify-ref is run to
+    make sure it reports the violation before the recovery.
+    """
+    set_signing_key(repo_dir, os.path.join(keys_dir, "unauthorized"))
+    commit_file(repo_dir, "README.md", f"Evil change {number}\n",
+                f"Totally not an evil change {number}")
+    measure_command("gittuf rsl record main", cwd=repo_dir)
+    rsl_id = git_output(["rev-parse", "refs/gittuf/reference-state-log"], repo_dir)
+    set_signing_key(repo_dir, os.path.join(keys_dir, "developer1"))
+    if check:
+        measure_command("gittuf verify-ref main", expected_retcode=1, cwd=repo_dir)
+
+    measure_command("git revert --no-edit HEAD", cwd=repo_dir)
+    measure_command(
+        f"gittuf rsl annotate --skip -m 'Undo malicious commit {number}' {rsl_id}",
+        cwd=repo_dir,
+    )
+    measure_command("gittuf rsl record main", cwd=repo_dir)
+
+@click.command()
+@benchmark_options
+@click.option(
+    "--annotation-counts", default="100,500,1000",
+    help="Comma-separated numbers of skip annotations at which to measure verification."
+)
+@click.option(
+    "--valid-per-annotation", default=2, type=int,
+    help="How many valid entries are interleaved between consecutive incidents."
+)
+@click.option(
+    "--distances", default="0,10,100,1000",
+    help="Comma-separated numbers of valid entries between the last annotation and the tip."
+)
+@click.option(
+    "--iterations", default=3, type=int,
+    help="How many times verify-ref is timed at every measurement point."
+)
+def benchmark2(repository_directory, annotation_counts, valid_per_annotation, distances, iterations,
+               results_file, results_database):
+    """Benchmark 2 for NDSS Artifact Evaluation"""
+
+    print("gittuf NDSS Artifact Evaluation - Benchmark 2")
+
+    print_section("[1 / 3] Repository Setup")
+
+    working_dir, keys_dir, _tmp_dir = prepare_workspace(repository_directory)
+    repo_dir = os.path.join(working_dir, "repo")
+
+    init_repository(repo_dir, os.path.join(keys_dir, "developer1"))
+    init_policy(repo_dir, keys_dir, [
+        ("protect-main", "git:refs/heads/main", ["developer1"]),
+        ("protect-feature", "git:refs/heads/feature", ["developer2"]),
+    ])
+    record_valid_change(repo_dir, 0)
+    print(f"Created {repo_dir} with the policy from experiment 4")
+
+    print_section("[2 / 3] Annotation Count Scaling")
+
+    rows = []
+    annotations = 0
+    valid = 1
+    for count in sorted(parse_int_list(annotation_counts)):
+        print(f"\nInjecting incidents until there are {count} skip annotations...")
+        # Valid entries come first so that the latest recovery is at the tip
+        while annotations < count:
+            for _ in range(valid_per_annotation):
+                record_valid_change(repo_dir, valid)
+                valid += 1
+            annotations += 1
+            # Verifying after every incident would make setup quadratic in the
+            # RSL length, so only the first one is checked
+            inject_incident(repo_dir, keys_dir, annotations, check=annotations == 1)
+
+        row = {"annotations": annotations, "distance": 0, "rsl_entries": rsl_length(repo_dir)}
+        row.update(time_verification(repo_dir, iterations))
+        rows.append(row)
+        print_table(COLUMNS, rows[-1:])
+
+    print_section("[3 / 3] Annotation Distance From Tip")
+
+    distance = 0
+    for target in sorted(parse_int_list(distances)):
+        print(f"\nMoving the latest annotation {target} entries away from the tip...")
+        while distance < target:
+            record_valid_change(repo_dir, valid)
+            valid += 1
+            distance += 1
+
+        row = {"annotations": annotations, "distance": distance,
+               "rsl_entries": rsl_length(repo_dir)}
+        row.update(time_verification(repo_dir, iterations))
+        rows.append(row)
+        print_table(COLUMNS, rows[-1:])
+
+    print()
+    print_table(COLUMNS, rows)
+    if results_file != "":
+        write_csv(results_file, COLUMNS, rows)
+        print(f"\nResults written to {results_file}")
+    if results_database != "":
+        run_id = record_run(results_database, "benchmark2", {
+            "annotation_counts": annotation_counts,
+            "valid_per_annotation": valid_per_annotation,
+            "distances": distances,
+            "iterations": iterations,
+        }, rows, ["annotations", "distance"])
+        print(f"\nResults recorded as run {run_id} in {results_database}")
+
+if __name__ == "__main__":
+    check_binaries(REQUIRED_BINARIES)
+    benchmark2() # pylint: disable=no-value-for-parameter
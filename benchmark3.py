@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#      benchmark3.py - The gittuf NDSS Artifact Evaluation Benchmark, pt. 3
+#
+#   This script re-runs verification workloads pinned to an increasing number
+#   of CPUs and reports how throughput scales with the core count.
+#
+################################################################################
+
+import os
+import shutil
+import click
+
+from bench import (
+    append_rsl_entries, benchmark_options, init_policy, init_repository, measure_command,
+    measure_parallel, parse_int_list, print_bar_chart, print_table, summarize, write_csv,
+)
+from results import record_run
+from utils import check_binaries, prepare_workspace, print_section
+
+REQUIRED_BINARIES = ["git", "gittuf", "ssh-keygen"]
+
+WORKLOADS = ["verify-ref", "parallel-verify", "multi-client-clone"]
+
+COLUMNS = ["workload", "cpus", "mean_s", "ops_per_s", "speedup", "efficiency"]
+
+# A core count is considered to add nothing once it improves throughput by
+# less than this fraction over the previous count
+FLATTENING_THRESHOLD = 0.1
+
+def available_cpus():
+    """Returns the CPUs this process may run on"""
+    return sorted(os.sched_getaffinity(0))
+
+def enable_cpu_controller(cgroup_root):
+    """Creates the cgroup root and lets its children use the cpu controller
+
+    A child cgroup only has cpu.max once the cpu controller is enabled in the
+    cgroup.subtree_control of every cgroup above it, so it is enabled from
+    the top of the hierarchy down to cgroup_root.
+    """
+    os.makedirs(cgroup_root, exist_ok=True)
+    directories = []
+    directory = os.path.abspath(cgroup_root)
+    while os.path.exists(os.path.join(directory, "cgroup.subtree_control")):
+        directories.append(directory)
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    if not directories:
+        raise Exception(f"{cgroup_root} is not in a cgroup v2 hierarchy.")
+    for directory in reversed(directories):
+        control = os.path.join(directory, "cgroup.subtree_control")
+        with open(control, encoding="utf-8") as fp:
+            enabled = fp.read().split()
+        if "cpu" not in enabled:
+            with open(control, "w", encoding="utf-8") as fp:
+                fp.write("+cpu\n")
+
+def cpu_limit(method, count, cgroup_root):
+    """Returns the command prefix and environment that limit a run to count CPUs"""
+    env = dict(os.environ)
+    if method == "taskset":
+        cpus = ",".join(str(c) for c in available_cpus()[:count])
+        return ["taskset", "-c", cpus], env
+
+    # cgroup v2 quotas do not change the CPUs the Go runtime sees, so it must
+    # be told explicitly how many threads to schedule on
+    cgroup_dir = os.path.join(cgroup_root, f"cpus-{count}")
+    os.makedirs(cgroup_dir, exist_ok=True)
+    with open(os.path.join(cgroup_dir, "cpu.max"), "w", encoding="utf-8") as fp:
+        fp.write(f"{count * 100000} 100000\n")
+    env["GOMAXPROCS"] = str(count)
+    procs = os.path.join(cgroup_dir, "cgroup.procs")
+    return ["sh", "-c", f'echo $$ > {procs} && exec "$@"', "sh"], env
+
+def run_workload(workload, repo_dir, clone_dirs, working_dir, parallel_jobs, prefix, env):
+    """Runs one iteration of a workload and returns its duration and op count"""
+    if workload == "verify-ref":
+        result = measure_command("gittuf verify-ref main", cwd=repo_dir, prefix=prefix, env=env,
+                                 profile=True)
+        return result["seconds"], 1
+
+    if workload == "parallel-verify":
+        jobs = [("gittuf verify-ref main", clone_dir) for clone_dir in clone_dirs]
+        elapsed, _ = measure_parallel(jobs, prefix=prefix, env=env, profile=True)
+        return elapsed, len(jobs)
+
+    targets = [os.path.join(working_dir, f"client_{i}") for i in range(parallel_jobs)]
+    jobs = [(f"gittuf clone {repo_dir} {target}", working_dir) for target in targets]
+    elapsed, _ = measure_parallel(jobs, prefix=prefix, env=env, profile=True)
+    for target in targets:
+        shutil.rmtree(target)
+    return elapsed, len(jobs)
+
+def flattening_point(rows):
+    """Returns the first core count that no longer improves throughput much"""
+    for previous, current in zip(rows, rows[1:]):
+        if current["ops_per_s"] < previous["ops_per_s"] * (1 + FLATTENING_THRESHOLD):
+            return previous["cpus"]
+    return None
+
+@click.command()
+@benchmark_options
+@click.option(
+    "--cpu-counts", default="1,2,4,8",
+    help="Comma-separated CPU counts; all available CPUs are always measured too."
+)
+@click.option(
+    "--limit-method", default="taskset", type=click.Choice(["taskset", "cgroup"]),
+    help="Whether to pin CPUs with taskset or to set a cgroup v2 cpu.max quota."
+)
+@click.option(
+    "--cgroup-root", default="/sys/fs/cgroup/gittuf-bench",
+    help="A writable cgroup v2 directory used by the cgroup limit method."
+)
+@click.option(
+    "--workloads", default=",".join(WORKLOADS),
+    help=f"Comma-separated workloads to run, out of {', '.join(WORKLOADS)}."
+)
+@click.option(
+    "--rsl-length", default=1000, type=int,
+    help="The number of RSL entries in the repository being verified."
+)
+@click.option(
+    "--parallel-jobs", default=8, type=int,
+    help="How many concurrent processes the parallel workloads start."
+)
+@click.option(
+    "--iterations", default=3, type=int,
+    help="How many times each workload is timed for every CPU count."
+)
+def benchmark3(repository_directory, cpu_counts, limit_method, cgroup_root, workloads, rsl_length,
+               parallel_jobs, iterations, results_file, results_database):
+    """Benchmark 3 for NDSS Artifact Evaluation"""
+
+    print("gittuf NDSS Artifact Evaluation - Benchmark 3")
+    selected = [w.strip() for w in workloads.split(",") if w.strip()]
+    for workload in selected:
+        if workload not in WORKLOADS:
+            raise click.BadParameter(f"unknown workload {workload}", param_hint="--workloads")
+
+    if limit_method == "taskset":
+        check_binaries(["taskset"])
+    else:
+        enable_cpu_controller(cgroup_root)
+
+    total_cpus = len(available_cpus())
+    counts = sorted({c for c in parse_int_list(cpu_counts) if c <= total_cpus} | {total_cpus})
+
+    print_section("[1 / 3] Repository Setup")
+
+    working_dir, keys_dir, _tmp_dir = prepare_workspace(repository_directory)
+    repo_dir = os.path.join(working_dir, "repo")
+
+    init_repository(repo_dir, os.path.join(keys_dir, "authorized"))
+    init_policy(repo_dir, keys_dir, [
+        ("protect-main", "git:refs/heads/main", ["authorized"]),
+    ])
+    append_rsl_entries(repo_dir, rsl_length)
+
+    clone_dirs = []
+    if "parallel-verify" in selected:
+        for i in range(parallel_jobs):
+            clone_dir = os.path.join(working_dir, f"verifier_{i}")
+            measure_command(f"gittuf clone {repo_dir} {clone_dir}", cwd=working_dir)
+            clone_dirs.append(clone_dir)
+    print(f"Created {repo_dir} with {rsl_length} RSL entries, measuring {counts} CPUs")
+
+    print_section("[2 / 3] Core-count Sweep")
+
+    rows = []
+    for workload in selected:
+        workload_rows = []
+        for count in counts:
+            prefix, env = cpu_limit(limit_method, count, cgroup_root)
+            durations = []
+            ops = 0
+            for _ in range(iterations):
+                elapsed, ops = run_workload(workload, repo_dir, clone_dirs, working_dir,
+                                            parallel_jobs, prefix, env)
+                durations.append(elapsed)
+            mean = summarize(durations)["mean"]
+            workload_rows.append({
+                "workload": workload, "cpus": count, "mean_s": mean, "ops_per_s": ops / mean,
+            })
+
+        baseline = workload_rows[0]["ops_per_s"]
+        for row in workload_rows:
+            row["speedup"] = row["ops_per_s"] / baseline
+            row["efficiency"] = row["speedup"] * workload_rows[0]["cpus"] / row["cpus"]
+        print_table(COLUMNS, workload_rows)
+        rows.extend(workload_rows)
+
+    print_section("[3 / 3] Throughput Versus Core Count")
+
+    for workload in selected:
+        workload_rows = [r for r in rows if r["workload"] == workload]
+        print_bar_chart(f"{workload} (operations per second)",
+                        [f"{r['cpus']} cpus" for r in workload_rows],
+                        [r["ops_per_s"] for r in workload_rows])
+        point = flattening_point(workload_rows)
+        if point is None:
+            print(f"  Throughput keeps scaling up to {workload_rows[-1]['cpus']} CPUs")
+        else:
+            print(f"  Scaling flattens after {point} CPUs")
+
+    if results_file != "":
+        write_csv(results_file, COLUMNS, rows)
+        print(f"\nResults written to {results_file}")
+    if results_database != "":
+        run_id = record_run(results_database, "benchmark3", {
+            "cpu_counts": cpu_counts,
+            "limit_method": limit_method,
+            "cgroup_root": cgroup_root,
+            "workloads": workloads,
+            "rsl_length": rsl_length,
+            "parallel_jobs": parallel_jobs,
+            "iterations": iterations,
+        }, rows, ["workload", "cpus"])
+        print(f"\nResults recorded as run {run_id} in {results_database}")
+
+if __name__ == "__main__":
+    check_binaries(REQUIRED_BINARIES)
+    benchmark3() # pylint: disable=no-value-for-parameter
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#      benchmark4.py - The gittuf NDSS Artifact Evaluation Benchmark, pt. 4
+#
+#   This script measures verification and RSL pulls against the same
+#   repository stored in different object layouts, from loose objects to
+#   repacked repositories with a commit-graph, multi-pack-index or bitmaps.
+#
+################################################################################
+
+import os
+import shutil
+import subprocess
+import click
+
+from bench import (
+    append_rsl_entries, benchmark_options, git_output, init_policy, init_repository,
+    measure_command, print_table, summarize, time_verification, write_csv,
+)
+from results import record_run
+from utils import check_binaries, prepare_workspace, print_section
+
+REQUIRED_BINARIES = ["git", "gittuf", "ssh-keygen"]
+
+# How many packs the multi-pack-index layout spreads the history over
+MIDX_PACKS = 4
+
+def write_incremental_packs(repo_dir):
+    """Packs the history in MIDX_PACKS batches, as incremental repacks would
+
+    Each pack holds the objects of a batch of commits that earlier packs do
+    not already have, and the loose copies are removed afterwards.
+    """
+    commits = git_output(["rev-list", "--reverse", "--all"], repo_dir).split()
+    size = -(-len(commits) // MIDX_PACKS)
+    for start in range(0, len(commits), size):
+        revs = commits[start:start + size] + [f"^{c}" for c in commits[:start]]
+        pack_base = os.path.join(".git", "objects", "pack", "pack")
+        subprocess.run(
+            ["git", "pack-objects", "-q", "--revs", pack_base], cwd=repo_dir,
+            input="\n".join(revs).encode() + b"\n", stdout=subprocess.DEVNULL, check=True,
+        )
+    measure_command("git prune-packed", cwd=repo_dir)
+
+# Maintenance steps that produce each layout from the loose repository, either
+# commands or functions of the repository directory. gc writes a commit-graph
+# by default, so it is disabled for the plain repack.
+LAYOUTS = {
+    "loose": [],
+    "gc": ["git -c gc.writeCommitGraph=false gc -q"],
+    "commit-graph": [
+        "git -c gc.writeCommitGraph=false gc -q",
+        "git commit-graph write --reachable",
+    ],
+    "multi-pack-index": [
+        write_incremental_packs,
+        "git multi-pack-index write --bitmap",
+        "git commit-graph write --reachable",
+    ],
+    "bitmaps": [
+        "git repack -a -d -q --write-bitmap-index",
+        "git commit-graph write --reachable",
+    ],
+}
+
+COLUMNS = [
+    "layout", "loose_objects", "packs", "verify_mean_s", "verify_max_rss_kb", "pull_mean_s",
+]
+
+def object_stats(repo_dir):
+    """Returns the loose object and pack counts reported by git count-objects"""
+    stats = {}
+    for line in git_output(["count-objects", "-v"], repo_dir).splitlines():
+        key, value = line.split(":", 1)
+        stats[key.strip()] = value.strip()
+    return int(stats["count"]), int(stats["packs"])
+
+def time_pulls(seed_dir, trial_dir, layout_dir, iterations):
+    """Times RSL pulls from the layout into fresh copies of a clone behind it"""
+    samples = []
+    for _ in range(iterations):
+        shutil.copytree(seed_dir, trial_dir, symlinks=True)
+        measure_command(f"git remote set-url origin {layout_dir}", cwd=trial_dir)
+        samples.append(
+            measure_command("gittuf rsl remote pull origin", cwd=trial_dir, profile=True)["seconds"]
+        )
+        shutil.rmtree(trial_dir)
+    return summarize(samples)["mean"]
+
+@click.command()
+@benchmark_options
+@click.option(
+    "--rsl-length", default=1000, type=int,
+    help="The number of RSL entries in the repository being verified."
+)
+@click.option(
+    "--pull-entries", default=100, type=int,
+    help="How many RSL entries the clone is behind when timing rsl remote pull."
+)
+@click.option(
+    "--layouts", default=",".join(LAYOUTS),
+    help=f"Comma-separated layouts to measure, out of {', '.join(LAYOUTS)}."
+)
+@click.option(
+    "--iterations", default=3, type=int,
+    help="How many times each operation is timed for every layout."
+)
+def benchmark4(repository_directory, rsl_length, pull_entries, layouts, iterations, results_file,
+               results_database):
+    """Benchmark 4 for NDSS Artifact Evaluation"""
+
+    print("gittuf NDSS Artifact Evaluation - Benchmark 4")
+    selected = [l.strip() for l in layouts.split(",") if l.strip()]
+    for layout in selected:
+        if layout not in LAYOUTS:
+            raise click.BadParameter(f"unknown layout {layout}", param_hint="--layouts")
+
+    print_section("[1 / 3] Repository Setup")
+
+    working_dir, keys_dir, _tmp_dir = prepare_workspace(repository_directory)
+    repo_dir = os.path.join(working_dir, "repo")
+    seed_dir = os.path.join(working_dir, "seed")
+    trial_dir = os.path.join(working_dir, "trial")
+
+    init_repository(repo_dir, os.path.join(keys_dir, "authorized"))
+    # Automatic gc would pack the loose layout behind the benchmark's back,
+    # and the copies of the repository inherit this setting
+    measure_command("git config gc.auto 0", cwd=repo_dir)
+    init_policy(repo_dir, keys_dir, [
+        ("protect-main", "git:refs/heads/main", ["authorized"]),
+    ])
+    append_rsl_entries(repo_dir, rsl_length - pull_entries)
+    measure_command(f"gittuf clone {repo_dir} {seed_dir}", cwd=working_dir)
+    append_rsl_entries(repo_dir, pull_entries)
+    print(f"Created {repo_dir} with {rsl_length} RSL entries, "
+          f"and a clone {pull_entries} entries behind it")
+
+    print_section("[2 / 3] Layout Measurements")
+
+    rows = []
+    for layout in selected:
+        layout_dir = os.path.join(working_dir, f"layout_{layout}")
+        shutil.copytree(repo_dir, layout_dir, symlinks=True)
+        for step in LAYOUTS[layout]:
+            if callable(step):
+                step(layout_dir)
+            else:
+                measure_command(step, cwd=layout_dir)
+
+        loose_objects, packs = object_stats(layout_dir)
+        if layout == "loose" and packs != 0:
+            raise Exception(f"The loose layout in {layout_dir} has {packs} packs.")
+        if layout == "multi-pack-index" and packs < 2:
+            raise Exception(f"The multi-pack-index layout in {layout_dir} has {packs} pack.")
+        verification = time_verification(layout_dir, iterations)
+        rows.append({
+            "layout": layout,
+            "loose_objects": loose_objects,
+            "packs": packs,
+            "verify_mean_s": verification["mean_s"],
+            "verify_max_rss_kb": verification["max_rss_kb"],
+            "pull_mean_s": time_pulls(seed_dir, trial_dir, layout_dir, iterations),
+        })
+        print_table(COLUMNS, rows[-1:])
+
+    print_section("[3 / 3] Summary")
+
+    print_table(COLUMNS, rows)
+    fastest_verify = min(rows, key=lambda r: r["verify_mean_s"])
+    fastest_pull = min(rows, key=lambda r: r["pull_mean_s"])
+    print(f"\nFastest verification: {fastest_verify['layout']}"
+          f" ({fastest_verify['verify_mean_s']:.4f}s)")
+    print(f"Fastest RSL pull: {fastest_pull['layout']} ({fastest_pull['pull_mean_s']:.4f}s)")
+
+    if results_file != "":
+        write_csv(results_file, COLUMNS, rows)
+        print(f"\nResults written to {results_file}")
+    if results_database != "":
+        run_id = record_run(results_database, "benchmark4", {
+            "rsl_length": rsl_length,
+            "pull_entries": pull_entries,
+            "layouts": layouts,
+            "iterations": iterations,
+        }, rows, ["layout"])
+        print(f"\nResults recorded as run {run_id} in {results_database}")
+
+if __name__ == "__main__":
+    check_binaries(REQUIRED_BINARIES)
+    benchmark4() # pylint: disable=no-value-for-parameter
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#      benchmark5.py - The gittuf NDSS Artifact Evaluation Benchmark, pt. 5
+#
+#   This script has several local writers, such as CI jobs sharing a mirror,
+#   commit to their own branches and run `gittuf rsl record` in the same
+#   repository at the same time, and measures how the RSL copes with the
+#   contention on refs/gittuf/reference-state-log.
+#
+################################################################################
+
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import click
+
+from bench import (
+    benchmark_options, git_output, init_policy, init_repository, measure_command, parse_int_list,
+    print_bar_chart, print_table, rsl_length, write_csv,
+)
+from results import record_run
+from utils import check_binaries, prepare_workspace, print_section
+
+REQUIRED_BINARIES = ["git", "gittuf", "ssh-keygen"]
+
+COLUMNS = [
+    "writers", "records", "wall_s", "records_per_s", "mean_record_s", "retries", "failures",
+    "lost_entries", "unverified_branches",
+]
+
+# How long a writer waits before retrying a failed record, multiplied by the
+# number of the attempt
+RETRY_DELAY = 0.05
+
+def write_commit(repo_dir, branch, number):
+    """Commits to a branch without touching the shared index or worktree"""
+    parent = git_output(["rev-parse", f"refs/heads/{branch}"], repo_dir)
+    tree = git_output(["rev-parse", f"{parent}^{{tree}}"], repo_dir)
+    commit = git_output(
+        ["commit-tree", "-S", "-p", parent, "-m", f"{branch} change {number}", tree], repo_dir
+    )
+    measure_command(f"git update-ref refs/heads/{branch} {commit} {parent}", cwd=repo_dir)
+
+def run_writer(repo_dir, branch, entries, max_retries, stats, lock):
+    """Commits and records entries changes to a branch, retrying failed records"""
+    for number in range(entries):
+        write_commit(repo_dir, branch, number)
+        for attempt in range(max_retries + 1):
+            result = measure_command(f"gittuf rsl record {branch}", expected_retcode=None,
+                                     cwd=repo_dir, profile=True)
+            with lock:
+                stats["record_seconds"].append(result["seconds"])
+            if result["retcode"] == 0:
+                with lock:
+                    stats["records"] += 1
+                break
+            if attempt == max_retries:
+                with lock:
+                    stats["failures"] += 1
+                break
+            with lock:
+                stats["retries"] += 1
+            time.sleep(RETRY_DELAY * (attempt + 1))
+
+def run_round(seed_dir, trial_dir, writers, entries, max_retries):
+    """Runs writers concurrently on a fresh copy of the seed repository"""
+    if os.path.exists(trial_dir):
+        shutil.rmtree(trial_dir)
+    shutil.copytree(seed_dir, trial_dir, symlinks=True)
+
+    branches = [f"writer-{i}" for i in range(writers)]
+    for branch in branches:
+        measure_command(f"git branch {branch} main", cwd=trial_dir)
+    before = rsl_length(trial_dir)
+
+    stats = {"records": 0, "retries": 0, "failures": 0, "record_seconds": []}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        futures = [
+            pool.submit(run_writer, trial_dir, branch, entries, max_retries, stats, lock)
+            for branch in branches
+        ]
+        # A writer that raised fails the round rather than skewing its results
+        for future in futures:
+            future.result()
+    wall = time.perf_counter() - start
+
+    # A record that reported success but whose entry was overwritten by a
+    # racing writer shows up as a lost entry, and leaves its branch unverifiable
+    lost = stats["records"] - (rsl_length(trial_dir) - before)
+    unverified = sum(
+        measure_command(f"gittuf verify-ref {branch}", expected_retcode=None,
+                        cwd=trial_dir)["retcode"] != 0
+        for branch in branches
+    )
+    return {
+        "writers": writers,
+        "records": stats["records"],
+        "wall_s": wall,
+        "records_per_s": stats["records"] / wall,
+        "mean_record_s": sum(stats["record_seconds"]) / len(stats["record_seconds"]),
+        "retries": stats["retries"],
+        "failures": stats["failures"],
+        "lost_entries": lost,
+        "unverified_branches": unverified,
+    }
+
+@click.command()
+@benchmark_options
+@click.option(
+    "--writers", default="1,2,4,8",
+    help="Comma-separated numbers of concurrent writers to benchmark."
+)
+@click.option(
+    "--entries-per-writer", default=20, type=click.IntRange(min=1),
+    help="How many commits each writer records in the RSL."
+)
+@click.option(
+    "--max-retries", default=5, type=int,
+    help="How often a writer retries a failed `gittuf rsl record` before giving up."
+)
+def benchmark5(repository_directory, writers, entries_per_writer, max_retries, results_file,
+               results_database):
+    """Benchmark 5 for NDSS Artifact Evaluation"""
+
+    print("gittuf NDSS Artifact Evaluation - Benchmark 5")
+
+    print_section("[1 / 3] Repository Setup")
+
+    working_dir, keys_dir, _tmp_dir = prepare_workspace(repository_directory)
+    seed_dir = os.path.join(working_dir, "repo_seed")
+    trial_dir = os.path.join(working_dir, "repo_shared")
+
+    init_repository(seed_dir, os.path.join(keys_dir, "authorized"))
+    init_policy(seed_dir, keys_dir, [
+        ("protect-writers", "git:refs/heads/writer-*", ["authorized"]),
+    ])
+    measure_command("git commit --allow-empty -q -m 'Initial commit'", cwd=seed_dir)
+    measure_command("gittuf rsl record main", cwd=seed_dir)
+    print(f"Created {seed_dir} with a policy protecting the writer branches")
+
+    print_section("[2 / 3] Concurrent Writers")
+
+    rows = []
+    for count in sorted(parse_int_list(writers)):
+        print(f"\n{count} writers recording {entries_per_writer} entries each...")
+        rows.append(run_round(seed_dir, trial_dir, count, entries_per_writer, max_retries))
+        print_table(COLUMNS, rows[-1:])
+
+    print_section("[3 / 3] Throughput Versus Writers")
+
+    print()
+    print_table(COLUMNS, rows)
+    print_bar_chart("RSL records per second", [f"{r['writers']} writers" for r in rows],
+                    [r["records_per_s"] for r in rows])
+    if any(r["lost_entries"] or r["unverified_branches"] for r in rows):
+        print("\nRacing writers lost RSL entries or left branches that no longer verify")
+
+    if results_file != "":
+        write_csv(results_file, COLUMNS, rows)
+        print(f"\nResults written to {results_file}")
+    if results_database != "":
+        run_id = record_run(results_database, "benchmark5", {
+            "writers": writers,
+            "entries_per_writer": entries_per_writer,
+            "max_retries": max_retries,
+        }, rows, ["writers"])
+        print(f"\nResults recorded as run {run_id} in {results_database}")
+
+if __name__ == "__main__":
+    check_binaries(REQUIRED_BINARIES)
+    benchmark5() # pylint: disable=no-value-for-parameter
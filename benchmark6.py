@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#      benchmark6.py - The gittuf NDSS Artifact Evaluation Benchmark, pt. 6
+#
+#   This script compares `gittuf clone` with partial, shallow and
+#   single-branch Git clones of a large synthetic repository that fetch
+#   refs/gittuf/* afterwards, and checks whether each can still be verified.
+#
+################################################################################
+
+import os
+import shutil
+import click
+
+from bench import (
+    benchmark_options, directory_bytes, generate_history, git_output, init_policy, init_repository,
+    measure_command, print_table, summarize, write_csv,
+)
+from results import record_run
+from utils import check_binaries, prepare_workspace, print_section
+
+REQUIRED_BINARIES = ["git", "gittuf", "ssh-keygen"]
+
+# How each variant clones the repository. Every variant except gittuf's own
+# clone fetches the gittuf refs afterwards with GITTUF_FETCH.
+CLONES = {
+    "gittuf-clone": "gittuf clone {url} {target}",
+    "full": "git clone -q {url} {target}",
+    "blobless": "git clone -q --filter=blob:none {url} {target}",
+    "shallow": "git clone -q --depth 1 {url} {target}",
+    "single-branch": "git clone -q --single-branch --branch main {url} {target}",
+}
+
+GITTUF_FETCH = "git fetch -q origin +refs/gittuf/*:refs/gittuf/*"
+
+COLUMNS = [
+    "variant", "clone_s", "fetch_gittuf_s", "verify_s", "verified", "clone_kb",
+    "lazy_fetch_kb",
+]
+
+def pack_kb(repo_dir):
+    """Returns the size of the packs of a repository in KiB"""
+    for line in git_output(["count-objects", "-v"], repo_dir).splitlines():
+        key, value = line.split(":", 1)
+        if key == "size-pack":
+            return int(value)
+    return 0
+
+def run_variant(variant, url, target, working_dir):
+    """Clones with a variant, fetches the gittuf refs and verifies main"""
+    if os.path.exists(target):
+        shutil.rmtree(target)
+    clone = measure_command(CLONES[variant].format(url=url, target=target), cwd=working_dir,
+                            profile=True)
+    fetch_seconds = 0.0
+    if variant != "gittuf-clone":
+        fetch_seconds = measure_command(GITTUF_FETCH, cwd=target, profile=True)["seconds"]
+
+    # Objects missing from a partial clone are fetched lazily into new
+    # promisor packs while gittuf reads them
+    before = pack_kb(target)
+    clone_kb = directory_bytes(os.path.join(target, ".git")) // 1024
+    verify = measure_command("gittuf verify-ref main", expected_retcode=None, cwd=target,
+                             profile=True)
+    return {
+        "clone_s": clone["seconds"],
+        "fetch_gittuf_s": fetch_seconds,
+        "verify_s": verify["seconds"],
+        "verified": int(verify["retcode"] == 0),
+        "clone_kb": clone_kb,
+        "lazy_fetch_kb": pack_kb(target) - before,
+    }
+
+@click.command()
+@benchmark_options
+@click.option(
+    "--files", default=2000, type=int,
+    help="How many files the synthetic repository contains."
+)
+@click.option(
+    "--file-size", default=4096, type=int,
+    help="Size of every file in bytes."
+)
+@click.option(
+    "--commits", default=200, type=int,
+    help="How many commits the main branch has."
+)
+@click.option(
+    "--changes-per-commit", default=20, type=int,
+    help="How many files every commit rewrites."
+)
+@click.option(
+    "--branches", default=4, type=int,
+    help="How many other branches, each with its own commits, the repository has."
+)
+@click.option(
+    "--variants", default=",".join(CLONES),
+    help="Comma-separated clone variants to benchmark."
+)
+@click.option(
+    "--iterations", default=3, type=int,
+    help="How many times each variant is measured."
+)
+def benchmark6(repository_directory, files, file_size, commits, changes_per_commit, branches,
+               variants, iterations, results_file, results_database):
+    """Benchmark 6 for NDSS Artifact Evaluation"""
+
+    print("gittuf NDSS Artifact Evaluation - Benchmark 6")
+    selected = [v.strip() for v in variants.split(",") if v.strip()]
+    for variant in selected:
+        if variant not in CLONES:
+            raise click.BadParameter(f"unknown variant {variant}", param_hint="--variants")
+
+    print_section("[1 / 3] Repository Setup")
+
+    working_dir, keys_dir, _tmp_dir = prepare_workspace(repository_directory)
+    server_dir = os.path.join(working_dir, "repo_server")
+    target = os.path.join(working_dir, "clone")
+
+    init_repository(server_dir, os.path.join(keys_dir, "authorized"))
+    init_policy(server_dir, keys_dir, [
+        ("protect-main", "git:refs/heads/main", ["authorized"]),
+    ])
+    generate_history(server_dir, files, commits, changes_per_commit, file_size)
+    measure_command("git commit --allow-empty -q -m 'Signed tip'", cwd=server_dir)
+    measure_command("gittuf rsl record main", cwd=server_dir)
+    for i in range(branches):
+        branch = f"branch-{i}"
+        measure_command(f"git branch {branch} main", cwd=server_dir)
+        generate_history(server_dir, files, commits // 4 or 1, changes_per_commit, file_size,
+                         seed=i + 1, branch=branch)
+        measure_command(f"gittuf rsl record {branch}", cwd=server_dir)
+
+    # Partial clones and lazy fetches must be allowed explicitly by the server
+    measure_command("git config uploadpack.allowFilter true", cwd=server_dir)
+    measure_command("git config uploadpack.allowAnySHA1InWant true", cwd=server_dir)
+    # A local path makes git hard link the objects and ignore --depth and
+    # --filter, so the variants clone over the file:// transport instead
+    url = f"file://{server_dir}"
+    print(f"Created {server_dir} ({directory_bytes(os.path.join(server_dir, '.git')) // 1024}"
+          f" KiB) with {files} files, {commits} commits on main and {branches} other branches")
+
+    print_section("[2 / 3] Clone Variants")
+
+    rows = []
+    for variant in selected:
+        samples = [run_variant(variant, url, target, working_dir) for _ in range(iterations)]
+        row = {"variant": variant}
+        for column in ["clone_s", "fetch_gittuf_s", "verify_s"]:
+            row[column] = summarize([s[column] for s in samples])["mean"]
+        for column in ["verified", "clone_kb", "lazy_fetch_kb"]:
+            row[column] = min(s[column] for s in samples)
+        rows.append(row)
+        print_table(COLUMNS, rows[-1:])
+
+    print_section("[3 / 3] Summary")
+
+    print_table(COLUMNS, rows)
+    for row in rows:
+        if not row["verified"]:
+            print(f"\n{row['variant']}: gittuf verify-ref main failed")
+        elif row["lazy_fetch_kb"] > 0:
+            print(f"\n{row['variant']}: verification lazily fetched {row['lazy_fetch_kb']} KiB")
+
+    if results_file != "":
+        write_csv(results_file, COLUMNS, rows)
+        print(f"\nResults written to {results_file}")
+    if results_database != "":
+        run_id = record_run(results_database, "benchmark6", {
+            "files": files,
+            "file_size": file_size,
+            "commits": commits,
+            "changes_per_commit": changes_per_commit,
+            "branches": branches,
+            "variants": variants,
+            "iterations": iterations,
+        }, rows, ["variant"])
+        print(f"\nResults recorded as run {run_id} in {results_database}")
+
+if __name__ == "__main__":
+    check_binaries(REQUIRED_BINARIES)
+    benchmark6() # pylint: disable=no-value-for-parameter
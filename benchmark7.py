@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#      benchmark7.py - The gittuf NDSS Artifact Evaluation Benchmark, pt. 7
+#
+#   This script builds a long RSL, measures how full verification grows with
+#   it, and then measures the next verification after a few more entries are
+#   appended, to tell whether verification cost follows the new entries or
+#   the whole history.
+#
+################################################################################
+
+import os
+import shutil
+import statistics
+import click
+
+from bench import (
+    append_rsl_entries, benchmark_options, gittuf_supports_cache, init_policy, init_repository,
+    measure_command, parse_int_list, print_bar_chart, print_table, summarize, time_verification,
+    write_csv,
+)
+from bench import rsl_length as count_rsl_entries
+from results import record_run
+from utils import check_binaries, prepare_workspace, print_section
+
+REQUIRED_BINARIES = ["git", "gittuf", "ssh-keygen"]
+
+COLUMNS = ["appended", "rsl_entries", "verify_s", "full_verify_s", "history_pct"]
+
+FIT_COLUMNS = [
+    "full_slope_ms", "append_slope_ms", "fixed_s", "append_intercept_s", "history_pct",
+]
+
+# Verification counts as incremental when less than this share of the
+# history's cost is still paid once the new entries are accounted for
+INCREMENTAL_HISTORY_PCT = 50
+
+def time_next_verification(base_dir, trial_dir, appended, iterations):
+    """Times the first verification after appending entries to a verified copy"""
+    samples = []
+    for _ in range(iterations):
+        if os.path.exists(trial_dir):
+            shutil.rmtree(trial_dir)
+        shutil.copytree(base_dir, trial_dir, symlinks=True)
+        append_rsl_entries(trial_dir, appended)
+        result = measure_command("gittuf verify-ref main", cwd=trial_dir, profile=True)
+        samples.append(result["seconds"])
+    return summarize(samples)["mean"], count_rsl_entries(trial_dir)
+
+def fit_costs(full_points, append_points, history_entries):
+    """Splits the cost of verification into fixed, per-history and per-new-entry parts
+
+    full_points are (RSL entries, seconds) of full verifications and
+    append_points (appended entries, seconds) of the next verification after
+    appending. The slope of the first is what each history entry costs, the
+    slope of the second what each new entry costs. Extrapolated to nothing
+    appended, the next verification still pays history_pct of the history's
+    cost: close to 0 when only new entries are verified, close to 100 when the
+    whole history is.
+    """
+    full_slope, fixed = statistics.linear_regression(*zip(*full_points))
+    append_slope, append_intercept = statistics.linear_regression(*zip(*append_points))
+    return {
+        "full_slope_ms": 1000 * full_slope,
+        "append_slope_ms": 1000 * append_slope,
+        "fixed_s": fixed,
+        "append_intercept_s": append_intercept,
+        "history_pct": 100 * (append_intercept - fixed) / (full_slope * history_entries),
+    }
+
+@click.command()
+@benchmark_options
+@click.option(
+    "--rsl-length", default=1000, type=click.IntRange(min=2),
+    help="Number of RSL entries before any are appended."
+)
+@click.option(
+    "--appends", default="1,10,100",
+    help="Comma-separated numbers, at least two, of entries to append before the next "
+         "verification."
+)
+@click.option(
+    "--iterations", default=3, type=int,
+    help="How many times each verification is timed."
+)
+def benchmark7(repository_directory, rsl_length, appends, iterations, results_file,
+               results_database):
+    """Benchmark 7 for NDSS Artifact Evaluation"""
+
+    print("gittuf NDSS Artifact Evaluation - Benchmark 7")
+    counts = sorted(set(parse_int_list(appends)))
+    if len(counts) < 2:
+        raise click.BadParameter("at least two counts are needed to fit a slope",
+                                 param_hint="--appends")
+
+    print_section("[1 / 3] Repository Setup")
+
+    working_dir, keys_dir, _tmp_dir = prepare_workspace(repository_directory)
+    base_dir = os.path.join(working_dir, "repo")
+    trial_dir = os.path.join(working_dir, "trial")
+
+    init_repository(base_dir, os.path.join(keys_dir, "authorized"))
+    init_policy(base_dir, keys_dir, [
+        ("protect-main", "git:refs/heads/main", ["authorized"]),
+    ])
+    # Full verification is timed at half and at the whole length, for the
+    # cost of each history entry
+    full_points = []
+    for length in (rsl_length // 2, rsl_length - rsl_length // 2):
+        append_rsl_entries(base_dir, length)
+        entries = count_rsl_entries(base_dir)
+        full = time_verification(base_dir, iterations)
+        full_points.append((entries, full["mean_s"]))
+        print(f"Full verification of {entries} RSL entries takes {full['mean_s']:.4f}s")
+    # Anything gittuf persists while verifying is kept in the base copy, so
+    # that every later verification can build on it
+    if gittuf_supports_cache():
+        measure_command("gittuf cache init", cwd=base_dir)
+        measure_command("gittuf verify-ref main", cwd=base_dir)
+        print("Enabled gittuf's persistent verification cache")
+
+    print_section("[2 / 3] Verification After Appending")
+
+    rows = []
+    for appended in counts:
+        verify_s, entries = time_next_verification(base_dir, trial_dir, appended, iterations)
+        rows.append({
+            "appended": appended,
+            "rsl_entries": entries,
+            "verify_s": verify_s,
+            "full_verify_s": full["mean_s"],
+            "history_pct": 100 * verify_s / full["mean_s"],
+        })
+        print_table(COLUMNS, rows[-1:])
+
+    print_section("[3 / 3] Summary")
+
+    print_table(COLUMNS, rows)
+    print_bar_chart("Next verification (seconds)", [f"+{r['appended']}" for r in rows],
+                    [r["verify_s"] for r in rows], unit="s")
+    fit = fit_costs(full_points, [(r["appended"], r["verify_s"]) for r in rows],
+                    full_points[-1][0])
+    print()
+    print_table(FIT_COLUMNS, [fit])
+    if fit["history_pct"] < INCREMENTAL_HISTORY_PCT:
+        print(f"\nEach new entry costs {fit['append_slope_ms']:.3f}ms and only "
+              f"{fit['history_pct']:.0f}% of the history's cost remains: "
+              "cost follows the newly appended entries")
+    else:
+        print(f"\nEach new entry costs {fit['append_slope_ms']:.3f}ms, but "
+              f"{fit['history_pct']:.0f}% of the history's cost "
+              f"({fit['full_slope_ms']:.3f}ms per entry) is paid again: "
+              "cost follows the whole history")
+
+    if results_file != "":
+        write_csv(results_file, COLUMNS, rows)
+        print(f"\nResults written to {results_file}")
+    if results_database != "":
+        run_id = record_run(results_database, "benchmark7", {
+            "rsl_length": rsl_length,
+            "appends": appends,
+            "iterations": iterations,
+        }, rows + [dict(fit, appended="fit")], ["appended"])
+        print(f"\nResults recorded as run {run_id} in {results_database}")
+
+if __name__ == "__main__":
+    check_binaries(REQUIRED_BINARIES)
+    benchmark7() # pylint: disable=no-value-for-parameter
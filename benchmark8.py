@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#      benchmark8.py - The gittuf NDSS Artifact Evaluation Benchmark, pt. 8
+#
+#   This script protects directory trees with file rules and measures how
+#   verification scales with the number of files a commit changes and the
+#   number of file rules in the policy.
+#
+################################################################################
+
+import os
+import shutil
+import click
+
+from bench import (
+    benchmark_options, generate_history, git_output, init_policy, init_repository, measure_command,
+    parse_int_list, print_table, time_verification, write_csv,
+)
+from results import record_run
+from utils import check_binaries, prepare_workspace, print_section
+
+REQUIRED_BINARIES = ["git", "gittuf", "ssh-keygen"]
+
+COLUMNS = [
+    "rules", "changed_files", "verify_mean_s", "verify_max_rss_kb", "base_verify_s",
+    "per_file_ms",
+]
+
+# generate_history stores 100 files per directory, and each rule protects one
+# of these directories
+FILES_PER_DIRECTORY = 100
+
+def commit_signed(repo_dir, source, message):
+    """Commits source's tree to main as a signed commit and records it in the RSL
+
+    git fast-import cannot sign commits, so the synthetic commits are only
+    used for their trees.
+    """
+    parent = git_output(["rev-parse", "refs/heads/main"], repo_dir)
+    tree = git_output(["rev-parse", f"{source}^{{tree}}"], repo_dir)
+    commit = git_output(["commit-tree", "-S", "-p", parent, "-m", message, tree], repo_dir)
+    measure_command(f"git update-ref refs/heads/main {commit} {parent}", cwd=repo_dir)
+    measure_command("gittuf rsl record main", cwd=repo_dir)
+
+def build_base(base_dir, keys_dir, rules, files, file_size):
+    """Creates a repository with file rules over files committed to main"""
+    init_repository(base_dir, os.path.join(keys_dir, "authorized"))
+    init_policy(base_dir, keys_dir, [
+        ("protect-main", "git:refs/heads/main", ["authorized"]),
+    ] + [
+        (f"protect-files-{k}", f"file:files/{k}/*", ["authorized"]) for k in range(rules)
+    ])
+    measure_command("git commit --allow-empty -q -m 'Initial commit'", cwd=base_dir)
+    measure_command("gittuf rsl record main", cwd=base_dir)
+    generate_history(base_dir, files, 1, 0, file_size, branch="synthetic")
+    commit_signed(base_dir, "synthetic", f"Add {files} files")
+
+@click.command()
+@benchmark_options
+@click.option(
+    "--changed-files", default="1,100,10000",
+    help="Comma-separated numbers of files changed by the verified commit."
+)
+@click.option(
+    "--rule-counts", default="1,10,100",
+    help="Comma-separated numbers of file rules in the policy."
+)
+@click.option(
+    "--file-size", default=256, type=int,
+    help="Size of every file in bytes."
+)
+@click.option(
+    "--iterations", default=3, type=int,
+    help="How many times each verification is timed."
+)
+def benchmark8(repository_directory, changed_files, rule_counts, file_size, iterations,
+               results_file, results_database):
+    """Benchmark 8 for NDSS Artifact Evaluation"""
+
+    print("gittuf NDSS Artifact Evaluation - Benchmark 8")
+    sizes = sorted(parse_int_list(changed_files))
+    files = sizes[-1]
+
+    print_section("[1 / 2] Changeset-size Sweep")
+
+    working_dir, keys_dir, _tmp_dir = prepare_workspace(repository_directory)
+    trial_dir = os.path.join(working_dir, "trial")
+
+    rows = []
+    for rules in sorted(parse_int_list(rule_counts)):
+        base_dir = os.path.join(working_dir, f"repo_{rules}_rules")
+        build_base(base_dir, keys_dir, rules, files, file_size)
+        base = time_verification(base_dir, iterations)
+        directories = -(-files // FILES_PER_DIRECTORY)
+        print(f"\nCreated {base_dir} with {files} files in {directories} directories "
+              f"and {rules} file rules")
+
+        for size in sizes:
+            if os.path.exists(trial_dir):
+                shutil.rmtree(trial_dir)
+            shutil.copytree(base_dir, trial_dir, symlinks=True)
+            measure_command("git branch -f synthetic main", cwd=trial_dir)
+            generate_history(trial_dir, files, 1, size, file_size, seed=size, branch="synthetic")
+            commit_signed(trial_dir, "synthetic", f"Change {size} files")
+
+            verification = time_verification(trial_dir, iterations)
+            rows.append({
+                "rules": rules,
+                "changed_files": size,
+                "verify_mean_s": verification["mean_s"],
+                "verify_max_rss_kb": verification["max_rss_kb"],
+                "base_verify_s": base["mean_s"],
+                "per_file_ms": 1000 * (verification["mean_s"] - base["mean_s"]) / size,
+            })
+            print_table(COLUMNS, rows[-1:])
+
+    print_section("[2 / 2] Summary")
+
+    print_table(COLUMNS, rows)
+    print("\nper_file_ms is the verification time added per changed file")
+
+    if results_file != "":
+        write_csv(results_file, COLUMNS, rows)
+        print(f"\nResults written to {results_file}")
+    if results_database != "":
+        run_id = record_run(results_database, "benchmark8", {
+            "changed_files": changed_files,
+            "rule_counts": rule_counts,
+            "file_size": file_size,
+            "iterations": iterations,
+        }, rows, ["rules", "changed_files"])
+        print(f"\nResults recorded as run {run_id} in {results_database}")
+
+if __name__ == "__main__":
+    check_binaries(REQUIRED_BINARIES)
+    benchmark8() # pylint: disable=no-value-for-parameter
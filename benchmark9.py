@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#      benchmark9.py - The gittuf NDSS Artifact Evaluation Benchmark, pt. 9
+#
+#   This script fills the RSL with entries for many CI-style branches and
+#   compares verifying a rarely updated branch with verifying a hot one, to
+#   tell whether verifying one ref scans the whole shared log.
+#
+################################################################################
+
+import os
+import random
+import click
+
+from bench import (
+    benchmark_options, git_output, init_policy, init_repository, measure_command, parse_int_list,
+    print_bar_chart, print_table, rsl_length, time_verification, write_csv,
+)
+from results import record_run
+from utils import check_binaries, prepare_workspace, print_section
+
+REQUIRED_BINARIES = ["git", "gittuf", "ssh-keygen"]
+
+COLUMNS = [
+    "rsl_entries", "branches", "hot_entries", "quiet_entries", "hot_verify_s",
+    "quiet_verify_s", "quiet_max_rss_kb", "quiet_over_hot",
+]
+
+HOT = "hot"
+QUIET = "release"
+
+def record_update(repo_dir, branch, tree, counts):
+    """Moves a branch to a new commit and records it in the RSL"""
+    parent = git_output(["rev-parse", f"refs/heads/{branch}"], repo_dir)
+    commit = git_output(
+        ["commit-tree", "-S", "-p", parent, "-m", f"{branch} update {counts[branch] + 1}", tree],
+        repo_dir,
+    )
+    measure_command(f"git update-ref refs/heads/{branch} {commit} {parent}", cwd=repo_dir)
+    measure_command(f"gittuf rsl record {branch}", cwd=repo_dir)
+    counts[branch] += 1
+
+@click.command()
+@benchmark_options
+@click.option(
+    "--branches", default=100, type=click.IntRange(min=1),
+    help="How many CI branches share the RSL with the hot and quiet branches."
+)
+@click.option(
+    "--rsl-lengths", default="1000,5000",
+    help="Comma-separated RSL lengths (number of entries) at which to measure."
+)
+@click.option(
+    "--hot-share", default=0.1, type=float,
+    help="Share of the RSL entries that belong to the hot branch."
+)
+@click.option(
+    "--iterations", default=3, type=int,
+    help="How many times each verification is timed."
+)
+def benchmark9(repository_directory, branches, rsl_lengths, hot_share, iterations, results_file,
+               results_database):
+    """Benchmark 9 for NDSS Artifact Evaluation"""
+
+    print("gittuf NDSS Artifact Evaluation - Benchmark 9")
+
+    print_section("[1 / 3] Repository Setup")
+
+    working_dir, keys_dir, _tmp_dir = prepare_workspace(repository_directory)
+    repo_dir = os.path.join(working_dir, "repo")
+
+    init_repository(repo_dir, os.path.join(keys_dir, "authorized"))
+    init_policy(repo_dir, keys_dir, [
+        ("protect-branches", "git:refs/heads/*", ["authorized"]),
+    ])
+    measure_command("git commit --allow-empty -q -m 'Initial commit'", cwd=repo_dir)
+    measure_command("gittuf rsl record main", cwd=repo_dir)
+    tree = git_output(["rev-parse", "main^{tree}"], repo_dir)
+
+    ci_branches = [f"ci-{i}" for i in range(branches)]
+    counts = {}
+    for branch in [QUIET, HOT] + ci_branches:
+        measure_command(f"git branch {branch} main", cwd=repo_dir)
+        counts[branch] = 0
+    # The quiet branch is updated once, right at the start of the log, and the
+    # hot branch gets an entry too, so it can be verified at any hot share
+    record_update(repo_dir, QUIET, tree, counts)
+    record_update(repo_dir, HOT, tree, counts)
+    print(f"Created {repo_dir} with a quiet branch, a hot branch and {branches} CI branches")
+
+    print_section("[2 / 3] Ref-density Sweep")
+
+    rng = random.Random(0)
+    recorded = rsl_length(repo_dir)
+    rows = []
+    for length in sorted(parse_int_list(rsl_lengths)):
+        print(f"\nExtending the RSL to {length} entries...")
+        for _ in range(length - recorded):
+            branch = HOT if rng.random() < hot_share else rng.choice(ci_branches)
+            record_update(repo_dir, branch, tree, counts)
+        recorded = max(recorded, length)
+
+        hot = time_verification(repo_dir, iterations, ref=HOT)
+        quiet = time_verification(repo_dir, iterations, ref=QUIET)
+        rows.append({
+            "rsl_entries": recorded,
+            "branches": branches + 3,
+            "hot_entries": counts[HOT],
+            "quiet_entries": counts[QUIET],
+            "hot_verify_s": hot["mean_s"],
+            "quiet_verify_s": quiet["mean_s"],
+            "quiet_max_rss_kb": quiet["max_rss_kb"],
+            "quiet_over_hot": quiet["mean_s"] / hot["mean_s"],
+        })
+        print_table(COLUMNS, rows[-1:])
+
+    print_section("[3 / 3] Summary")
+
+    print_table(COLUMNS, rows)
+    print_bar_chart("Quiet branch verification (seconds)",
+                    [f"{r['rsl_entries']} entries" for r in rows],
+                    [r["quiet_verify_s"] for r in rows], unit="s")
+    if len(rows) > 1:
+        growth = rows[-1]["quiet_verify_s"] / rows[0]["quiet_verify_s"]
+        log_growth = rows[-1]["rsl_entries"] / rows[0]["rsl_entries"]
+        print(f"\nThe RSL grew {log_growth:.1f}x and verifying the quiet branch, whose single "
+              f"entry did not change, became {growth:.1f}x slower")
+
+    if results_file != "":
+        write_csv(results_file, COLUMNS, rows)
+        print(f"\nResults written to {results_file}")
+    if results_database != "":
+        run_id = record_run(results_database, "benchmark9", {
+            "branches": branches,
+            "rsl_lengths": rsl_lengths,
+            "hot_share": hot_share,
+            "iterations": iterations,
+        }, rows, ["rsl_entries"])
+        print(f"\nResults recorded as run {run_id} in {results_database}")
+
+if __name__ == "__main__":
+    check_binaries(REQUIRED_BINARIES)
+    benchmark9() # pylint: disable=no-value-for-parameter
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#        capture.py - Captures command output into per-step log files
+#
+#   Output is drained from both pipes concurrently with non-blocking reads, so
+#   a child never stalls on a full pipe and the terminal is never involved.
+#   Output is kept in memory up to a threshold and then spills to disk, and
+#   anything beyond a size cap is dropped and counted.
+#
+################################################################################
+
+import json
+import os
+import re
+import selectors
+import subprocess
+
+READ_SIZE = 65536
+
+# key=value pairs as written by gittuf's --verbose logging, e.g.
+# time=2024-10-01T12:00:00Z level=DEBUG msg="Verifying entry"
+_LOGFMT_PAIR = re.compile(r'(\w[\w.-]*)=("(?:[^"\\]|\\.)*"|\S*)')
+
+class OutputSink:
+    """Buffers a stream in memory and spills it to a log file once it grows"""
+
+    def __init__(self, path, spill_bytes, max_bytes):
+        self.path = path
+        self.spill_bytes = spill_bytes
+        self.max_bytes = max_bytes
+        self.buffer = bytearray()
+        self.fp = None
+        self.written = 0
+        self.dropped = 0
+
+    def write(self, chunk):
+        room = self.max_bytes - self.written
+        if room < len(chunk):
+            self.dropped += len(chunk) - max(room, 0)
+            chunk = chunk[:max(room, 0)]
+        self.written += len(chunk)
+
+        if self.fp is None:
+            self.buffer += chunk
+            if len(self.buffer) > self.spill_bytes:
+                self._spill()
+        else:
+            self.fp.write(chunk)
+
+    def close(self):
+        if self.fp is None and (self.buffer or self.dropped):
+            self._spill()
+        if self.fp is not None:
+            if self.dropped:
+                self.fp.write(f"\n[{self.dropped} bytes dropped over the size cap]\n".encode())
+            self.fp.close()
+            self.fp = None
+
+    def tail(self, size=2000):
+        """Returns the end of the captured output, for error reports"""
+        if not os.path.exists(self.path):
+            return bytes(self.buffer[-size:]).decode("utf-8", errors="replace")
+        with open(self.path, "rb") as fp:
+            fp.seek(max(os.path.getsize(self.path) - size, 0))
+            return fp.read().decode("utf-8", errors="replace")
+
+    def _spill(self):
+        # Several commands of the same step share a log, so always append
+        self.fp = open(self.path, "ab") # pylint: disable=consider-using-with
+        self.fp.write(self.buffer)
+        self.buffer = bytearray()
+
+def run_captured(args, cwd, env, log_base, spill_bytes, max_bytes):
+    """Runs a command, draining stdout and stderr into log_base.*.log
+
+    Returns the exit code, the sink holding standard error and the peak
+    resident set size of the command in KiB.
+    """
+    proc = subprocess.Popen(args, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    sinks = {
+        proc.stdout: OutputSink(f"{log_base}.stdout.log", spill_bytes, max_bytes),
+        proc.stderr: OutputSink(f"{log_base}.stderr.log", spill_bytes, max_bytes),
+    }
+    with selectors.DefaultSelector() as selector:
+        for pipe in sinks:
+            os.set_blocking(pipe.fileno(), False)
+            selector.register(pipe, selectors.EVENT_READ)
+        while selector.get_map():
+            for key, _ in selector.select():
+                try:
+                    chunk = os.read(key.fd, READ_SIZE)
+                except BlockingIOError:
+                    continue
+                if chunk:
+                    sinks[key.fileobj].write(chunk)
+                else:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    for sink in sinks.values():
+        sink.close()
+    return proc.returncode, sinks[proc.stderr], rusage.ru_maxrss
+
+def parse_gittuf_events(log_path, cmd, offset=0):
+    """Parses gittuf's verbose log lines from offset into structured events"""
+    events = []
+    if not os.path.exists(log_path):
+        return events
+    with open(log_path, "rb") as fp:
+        fp.seek(offset)
+        for line in fp.read().decode("utf-8", errors="replace").splitlines():
+            pairs = _LOGFMT_PAIR.findall(line)
+            fields = {key: _unquote(value) for key, value in pairs}
+            if "level" not in fields or "msg" not in fields:
+                continue
+            fields["command"] = cmd
+            events.append(fields)
+    return events
+
+def write_events(events, path):
+    """Appends structured events to a JSON lines file"""
+    with open(path, "a", encoding="utf-8") as fp:
+        for event in events:
+            fp.write(json.dumps(event) + "\n")
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        # Go quoting is JSON compatible except for a few rare escapes
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return value[1:-1]
+    return value
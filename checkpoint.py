@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#       checkpoint.py - Workspace snapshots for resuming long scenarios
+#
+#   A checkpoint is a copy of the whole working directory (repositories and
+#   keys) plus a manifest of the scenario state that is not on disk. Git never
+#   modifies an object file once it is written, so objects are hard linked
+#   rather than copied, which keeps snapshots of large repositories cheap.
+#
+################################################################################
+
+import json
+import os
+import shutil
+
+MANIFEST = "manifest.json"
+
+# Only git's object store is immutable, worktree files are changed in place
+OBJECTS = f"{os.sep}.git{os.sep}objects{os.sep}"
+
+def _link_or_copy(src, dst):
+    if OBJECTS in src:
+        try:
+            os.link(src, dst)
+            return dst
+        except OSError:
+            pass
+    return shutil.copy2(src, dst)
+
+def _clear_directory(directory, keep):
+    # Removes everything in directory except keep and the directories above it
+    for name in os.listdir(directory):
+        entry = os.path.join(directory, name)
+        if entry == keep:
+            continue
+        if os.path.isdir(entry) and not os.path.islink(entry):
+            if os.path.commonpath([entry, keep]) == entry:
+                _clear_directory(entry, keep)
+            else:
+                shutil.rmtree(entry)
+        else:
+            os.remove(entry)
+
+def _rebase_git_configs(working_dir, old_working_dir):
+    # Repositories record signing keys and remotes by absolute path
+    for root, _, files in os.walk(working_dir):
+        if os.path.basename(root) != ".git" or "config" not in files:
+            continue
+        config = os.path.join(root, "config")
+        with open(config, encoding="utf-8") as fp:
+            content = fp.read()
+        with open(config, "w", encoding="utf-8") as fp:
+            fp.write(content.replace(old_working_dir, working_dir))
+
+def checkpoint_path(checkpoint_directory, section):
+    """Returns the directory holding the checkpoint taken before a section"""
+    return os.path.join(os.path.abspath(checkpoint_directory), f"section-{section}")
+
+def save_checkpoint(checkpoint_directory, section, working_dir, state):
+    """Snapshots the working directory before the given (1-based) section"""
+    path = checkpoint_path(checkpoint_directory, section)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+
+    ignore = None
+    checkpoint_root = os.path.abspath(checkpoint_directory)
+    if checkpoint_root.startswith(working_dir + os.sep):
+        # Never snapshot the checkpoints themselves
+        ignore = lambda directory, names: [
+            n for n in names if os.path.join(directory, n) == checkpoint_root
+        ]
+    shutil.copytree(working_dir, os.path.join(path, "workspace"), symlinks=True,
+                    copy_function=_link_or_copy, ignore=ignore)
+
+    manifest = {"section": section, "working_dir": working_dir}
+    manifest.update(state)
+    with open(os.path.join(path, MANIFEST), "w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, indent=2)
+
+def read_manifest(checkpoint_directory, section):
+    """Returns the manifest of the checkpoint taken before a section"""
+    manifest_path = os.path.join(checkpoint_path(checkpoint_directory, section), MANIFEST)
+    if not os.path.exists(manifest_path):
+        raise Exception(f"No checkpoint for section {section} in {checkpoint_directory}.")
+    with open(manifest_path, encoding="utf-8") as fp:
+        return json.load(fp)
+
+def restore_checkpoint(checkpoint_directory, section, working_dir=""):
+    """Restores the snapshot taken before a section and returns its manifest
+
+    The workspace is restored to the directory it was snapshotted from unless
+    another one is given, in which case the absolute paths in the git configs
+    of its repositories are rewritten to the new location.
+    """
+    manifest = read_manifest(checkpoint_directory, section)
+    old_working_dir = manifest["working_dir"]
+    working_dir = os.path.abspath(working_dir) if working_dir else old_working_dir
+    if os.path.exists(working_dir):
+        _clear_directory(working_dir, os.path.abspath(checkpoint_directory))
+    shutil.copytree(os.path.join(checkpoint_path(checkpoint_directory, section), "workspace"),
+                    working_dir, symlinks=True, copy_function=_link_or_copy, dirs_exist_ok=True)
+    if working_dir != old_working_dir:
+        _rebase_git_configs(working_dir, old_working_dir)
+    manifest["working_dir"] = working_dir
+    return manifest
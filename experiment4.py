@@ -8,300 +8,224 @@
 #
 ################################################################################
 
-import os
-import shutil
-import tempfile
 import click
-import subprocess
 
-from utils import prompt_key, display_command, run_command, check_binaries, print_section
+from scenario import run_scenario, scenario_options, signing_commands
+from utils import check_binaries
 
 REQUIRED_BINARIES = ["git", "gittuf", "ssh-keygen"]
 
-REPOSITORY_STEPS = 3
-GITTUF_STEPS = 7
-DEMO_STEPS = 10
-RECOVERY_STEPS = 5
+SCENARIO = {
+    "name": "experiment4",
+    "title": "gittuf NDSS Artifact Evaluation - Experiment 4",
+    # Repo A is the "origin" repo for Repo B
+    "directories": ["repo_a"],
+    "clones": ["repo_b"],
+    "sections": [
+        {
+            "title": "Repository Setup",
+            "steps": [
+                # Initialize the Git repository in the chosen directory
+                {
+                    "prompt": "Initialize Git repository",
+                    "repo": "repo_a",
+                    "commands": ["git init -b main"],
+                },
+                # Set the configuration options needed to sign commits. For
+                # this demo, developer 1's key is used, but note that this is
+                # not the key used for managing the policy.
+                {
+                    "prompt": "Set repo config to use demo identity and test key",
+                    "repo": "repo_a",
+                    "commands": signing_commands("developer1"),
+                },
+                {
+                    "prompt": "Set PAGER",
+                    "commands": [{"env": {"PAGER": "cat"}}],
+                },
+            ],
+        },
+        {
+            "title": "gittuf Setup",
+            "steps": [
+                {
+                    "prompt": "Initialize gittuf root of trust",
+                    "repo": "repo_a",
+                    "commands": ["gittuf trust init -k {keys}/root"],
+                },
+                {
+                    "prompt": "Add policy key to gittuf root of trust",
+                    "repo": "repo_a",
+                    "commands": [
+                        "gittuf trust add-policy-key"
+                        " -k {keys}/root"
+                        " --policy-key {keys}/targets.pub"
+                    ],
+                },
+                {
+                    "prompt": "Initialize policy",
+                    "repo": "repo_a",
+                    "commands": ["gittuf policy init -k {keys}/targets"],
+                },
+                {
+                    "prompt": "Add a rule to protect the main branch",
+                    "repo": "repo_a",
+                    "commands": [
+                        "gittuf policy add-rule"
+                        " -k {keys}/targets"
+                        " --rule-name 'protect-main'"
+                        " --rule-pattern git:refs/heads/main"
+                        " --authorize-key {keys}/developer1.pub"
+                    ],
+                },
+                {
+                    "prompt": "Add a rule to protect the feature branch",
+                    "repo": "repo_a",
+                    "commands": [
+                        "gittuf policy add-rule"
+                        " -k {keys}/targets"
+                        " --rule-name 'protect-feature'"
+                        " --rule-pattern git:refs/heads/feature"
+                        " --authorize-key {keys}/developer2.pub"
+                    ],
+                },
+                {
+                    "prompt": "Apply the policy",
+                    "repo": "repo_a",
+                    "commands": ["gittuf policy apply"],
+                },
+                # Ensure that everything is OK by verifying the state of the
+                # repository
+                {
+                    "prompt": "Verify policy",
+                    "repo": "repo_a",
+                    "commands": ["gittuf --verbose verify-ref refs/gittuf/policy"],
+                },
+            ],
+        },
+        # Write rule violation
+        {
+            "title": "Write Rule Violations",
+            "steps": [
+                {
+                    "prompt": "Make authorized change to repo's main branch",
+                    "repo": "repo_a",
+                    "commands": [
+                        {"write": "README.md", "content": "Hello, world!\n"},
+                        "git add README.md",
+                        "git commit -m 'Initial commit'",
+                    ],
+                },
+                {
+                    "prompt": "Record change to main in RSL",
+                    "repo": "repo_a",
+                    "commands": [
+                        "gittuf rsl record main",
+                        "git show refs/gittuf/reference-state-log",
+                    ],
+                },
+                {
+                    "prompt": "Update repo config to use unauthorized key",
+                    "repo": "repo_a",
+                    "commands": ["git config --local user.signingkey {keys}/unauthorized"],
+                },
+                {
+                    "id": "clone",
+                    "prompt": "Another user clones the git repository",
+                    "commands": ["gittuf clone {repo_a} repo_b"],
+                },
+                # The other user's verification and the unauthorized change
+                # happen in different repositories and are independent
+                {
+                    "id": "verify-clone",
+                    "prompt": "Verify the state of the repository",
+                    "repo": "repo_b",
+                    "commands": ["gittuf --verbose verify-ref main"],
+                    "depends": ["clone"],
+                },
+                {
+                    "prompt": "Make unauthorized change to original repo's main branch",
+                    "repo": "repo_a",
+                    "commands": [
+                        {"write": "README.md", "content": "Evil change!\n"},
+                        "git add README.md",
+                        "git commit -m 'Totally not an evil change'",
+                    ],
+                    "depends": ["clone"],
+                },
+                {
+                    "id": "record-unauthorized",
+                    "prompt": "Record change to main in RSL",
+                    "repo": "repo_a",
+                    "commands": ["gittuf rsl record main"],
+                },
+                {
+                    "prompt": "The other user fetches changes",
+                    "repo": "repo_b",
+                    "commands": ["git pull"],
+                    "depends": ["verify-clone", "record-unauthorized"],
+                },
+                {
+                    "prompt": "Now, the user pulls the RSL from the remote repository",
+                    "repo": "repo_b",
+                    "commands": ["gittuf rsl remote pull origin"],
+                },
+                {
+                    "prompt": "Finally, the user attempts to verify the state of the "
+                              "repository...",
+                    "repo": "repo_b",
+                    "commands": [{"run": "gittuf --verbose verify-ref main", "expected": 1}],
+                    "message": "\n... but is warned by gittuf that there's a policy violation!",
+                },
+            ],
+        },
+        {
+            "title": "Recovery",
+            "steps": [
+                {
+                    "prompt": "Set repo config to use developer 2's identity and test key",
+                    "repo": "repo_b",
+                    "commands": signing_commands("developer2"),
+                },
+                {
+                    "prompt": "Revert the problematic commit",
+                    "repo": "repo_b",
+                    "commands": [
+                        "git revert --no-edit HEAD",
+                        {
+                            "capture": "rsl_id",
+                            "run": "git rev-parse refs/gittuf/reference-state-log",
+                        },
+                    ],
+                },
+                {
+                    "prompt": "Add an annotation to the RSL invalidating the previous commit's "
+                              "RSL entry",
+                    "repo": "repo_b",
+                    "commands": ["gittuf rsl annotate --skip -m 'Undo malicious commit' {rsl_id}"],
+                },
+                {
+                    "prompt": "Record change to main in RSL",
+                    "repo": "repo_b",
+                    "commands": ["gittuf rsl record main"],
+                },
+                {
+                    "prompt": "Now, the user attempts to verify the state of the repository "
+                              "again...",
+                    "repo": "repo_b",
+                    "commands": ["gittuf --verbose verify-ref main"],
+                    "message": "... and finds that the issue has been fixed.",
+                },
+            ],
+        },
+    ],
+}
 
 @click.command()
-@click.option(
-    "--automatic", default=False, type=bool, is_flag=True,
-    help="Whether to wait for input before each command is run."
-)
-@click.option(
-    "--repository-directory", default="",
-    help="The path where the script should store the working copy of the repository."
-)
-def experiment4(automatic, repository_directory):
+@scenario_options
+def experiment4(**options):
     """Experiment 4 for NDSS Artifact Evaluation"""
-
-    print("gittuf NDSS Artifact Evaluation - Experiment 4")
-
-    # Repository Setup
-    print_section("[1 / 4] Repository Setup")
-
-    step = 1
-
-    # Set up directory structure and keys
-    current_dir = os.getcwd()
-    keys_dir = "keys"
-
-    # Select folder for the working repository copy
-    working_dir = repository_directory
-    if working_dir == "":
-        tmp_dir =  tempfile.TemporaryDirectory()
-        working_dir = tmp_dir.name
-    else:
-        working_dir = os.path.abspath(repository_directory)
-
-    tmp_keys_dir = os.path.join(working_dir, keys_dir)
-    tmp_repo_dir = os.path.join(working_dir, "repo")
-
-    shutil.copytree(os.path.join(current_dir, keys_dir), tmp_keys_dir)
-
-    # Repo A is the "origin" repo for Repo B
-    tmp_repo_a_dir = os.path.join(working_dir, "repo_a")
-    tmp_repo_b_dir = os.path.join(working_dir, "repo_b")
-
-    os.mkdir(tmp_repo_a_dir)
-    os.chdir(tmp_repo_a_dir)
-
-    # Ensure correct permissions for keys
-    for key in os.listdir(tmp_keys_dir):
-        os.chmod(os.path.join(tmp_keys_dir, key), 0o600)
-
-    # Compute folder paths
-    root_private_key_path = os.path.join(tmp_keys_dir, "root")
-    targets_private_key_path = os.path.join(tmp_keys_dir, "targets")
-    unauthorized_private_key_path = os.path.join(tmp_keys_dir, "unauthorized")
-    dev1_private_key_path = os.path.join(tmp_keys_dir, "developer1")
-    dev2_private_key_path = os.path.join(tmp_keys_dir, "developer2")
-
-    targets_public_key_path = os.path.join(tmp_keys_dir, "targets.pub")
-    dev1_public_key_path = os.path.join(tmp_keys_dir, "developer1.pub")
-    dev2_public_key_path = os.path.join(tmp_keys_dir, "developer2.pub")
-
-    # Initialize the Git repository in the chosen directory
-    step = prompt_key(automatic, step, REPOSITORY_STEPS, "Initialize Git repository")
-    cmd = "git init -b main"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    # Set the configuration options needed to sign commits. For this demo, the
-    # "authorized" key is used, but note that this is not the key used for
-    # managing the policy.
-    step = prompt_key(automatic, step, REPOSITORY_STEPS, "Set repo config to use demo identity and test key")
-    cmd = "git config --local gpg.format ssh"
-    display_command(cmd)
-    run_command(cmd, 0)
-    cmd = "git config --local commit.gpgsign true"
-    display_command(cmd)
-    run_command(cmd, 0)
-    cmd = f"git config --local user.signingkey {dev1_private_key_path}"
-    display_command(cmd)
-    run_command(cmd, 0)
-    cmd = "git config --local user.name gittuf-demo"
-    display_command(cmd)
-    run_command(cmd, 0)
-    cmd = "git config --local user.email gittuf.demo@example.com"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, REPOSITORY_STEPS, "Set PAGER")
-    os.environ["PAGER"] = "cat"
-    display_command("export PAGER=cat")
-
-    # gittuf Setup
-    print_section("[2 / 4] gittuf Setup")
-
-    step = 1
-
-    step = prompt_key(automatic, step, GITTUF_STEPS, "Initialize gittuf root of trust")
-    cmd = f"gittuf trust init -k {root_private_key_path}"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, GITTUF_STEPS, "Add policy key to gittuf root of trust")
-    cmd = (
-        "gittuf trust add-policy-key"
-        f" -k {root_private_key_path}"
-        f" --policy-key {targets_public_key_path}"
-    )
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, GITTUF_STEPS, "Initialize policy")
-    cmd = f"gittuf policy init -k {targets_private_key_path}"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, GITTUF_STEPS, "Add a rule to protect the main branch")
-    cmd = (
-        "gittuf policy add-rule"
-        f" -k {targets_private_key_path}"
-        " --rule-name 'protect-main'"
-        " --rule-pattern git:refs/heads/main"
-        f" --authorize-key {dev1_public_key_path}"
-    )
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, GITTUF_STEPS, "Add a rule to protect the feature branch")
-    cmd = (
-        "gittuf policy add-rule"
-        f" -k {targets_private_key_path}"
-        " --rule-name 'protect-feature'"
-        " --rule-pattern git:refs/heads/feature"
-        f" --authorize-key {dev2_public_key_path}"
-    )
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, GITTUF_STEPS, "Apply the policy")
-    cmd = "gittuf policy apply"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    # Ensure that everything is OK by verifying the state of the repository
-    step = prompt_key(automatic, step, GITTUF_STEPS, "Verify policy")
-    cmd = "gittuf --verbose verify-ref refs/gittuf/policy"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    # Write rule violation
-    print_section("[3 / 4] Write Rule Violations")
-
-    step = 1
-
-    step = prompt_key(automatic, step, DEMO_STEPS, "Make authorized change to repo's main branch")
-    display_command("echo 'Hello, world!' > README.md")
-    with open("README.md", "w", encoding="utf-8") as fp:
-        fp.write("Hello, world!\n")
-    cmd = "git add README.md"
-    display_command(cmd)
-    run_command(cmd, 0)
-    cmd = "git commit -m 'Initial commit'"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, DEMO_STEPS, "Record change to main in RSL")
-    cmd = "gittuf rsl record main"
-    display_command(cmd)
-    run_command(cmd, 0)
-    cmd = "git show refs/gittuf/reference-state-log"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, DEMO_STEPS, "Update repo config to use unauthorized key")
-    cmd = f"git config --local user.signingkey {unauthorized_private_key_path}"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, DEMO_STEPS, "Another user clones the git repository")
-    cmd = f"cd {working_dir}"
-    display_command(cmd)
-    os.chdir(working_dir)
-    cmd = f"gittuf clone {tmp_repo_a_dir} repo_b"
-    display_command(cmd)
-    run_command(cmd, 0)
-    cmd = "cd repo_b"
-    display_command(cmd)
-    os.chdir(tmp_repo_b_dir)
-
-    step = prompt_key(automatic, step, GITTUF_STEPS, "Verify the state of the repository")
-    cmd = "gittuf --verbose verify-ref main"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, DEMO_STEPS, "Make unauthorized change to original repo's main branch")
-    cmd = "cd repo_a"
-    display_command(cmd)
-    os.chdir("../repo_a")
-    display_command("echo 'Evil change!' > README.md")
-    with open("README.md", "w", encoding="utf-8") as fp:
-        fp.write("Evil change!\n")
-    cmd = "git add README.md"
-    display_command(cmd)
-    run_command(cmd, 0)
-    cmd = "git commit -m 'Totally not an evil change'"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, DEMO_STEPS, "Record change to main in RSL")
-    cmd = "gittuf rsl record main"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    cmd = f"cd {tmp_repo_a_dir}"
-    display_command(cmd)
-    os.chdir(tmp_repo_a_dir)
-
-    step = prompt_key(automatic, step, DEMO_STEPS, "The other user fetches changes")
-    cmd = "cd repo_b"
-    display_command(cmd)
-    os.chdir(tmp_repo_b_dir)
-    cmd = "git pull"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, DEMO_STEPS, "Now, the user pulls the RSL from the remote repository")
-    cmd = "gittuf rsl remote pull origin"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, DEMO_STEPS, "Finally, the user attempts to verify the state of the repository...")
-    cmd = "gittuf --verbose verify-ref main"
-    display_command(cmd)
-    run_command(cmd, 1)
-
-    print("\n... but is warned by gittuf that there's a policy violation!")
-
-    # Recovery
-    print_section("[4 / 4] Recovery")
-
-    step = 1
-
-    step = prompt_key(automatic, step, REPOSITORY_STEPS, "Set repo config to use developer 2's identity and test key")
-    cmd = "git config --local gpg.format ssh"
-    display_command(cmd)
-    run_command(cmd, 0)
-    cmd = "git config --local commit.gpgsign true"
-    display_command(cmd)
-    run_command(cmd, 0)
-    cmd = f"git config --local user.signingkey {dev2_private_key_path}"
-    display_command(cmd)
-    run_command(cmd, 0)
-    cmd = "git config --local user.name gittuf-demo"
-    display_command(cmd)
-    run_command(cmd, 0)
-    cmd = "git config --local user.email gittuf.demo@example.com"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, RECOVERY_STEPS, "Revert the problematic commit")
-    cmd = "git revert --no-edit HEAD"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    rsl_id = subprocess.check_output(["git", "show", "--format='%H'", "refs/gittuf/reference-state-log"]).decode('utf-8')
-
-    step = prompt_key(automatic, step, RECOVERY_STEPS,
-    "Add an annotation to the RSL invalidating the previous commit's RSL entry")
-    cmd = f"gittuf rsl annotate --skip -m 'Undo malicious commit' {rsl_id}"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, RECOVERY_STEPS, "Record change to main in RSL")
-    cmd = "gittuf rsl record main"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    step = prompt_key(automatic, step, RECOVERY_STEPS, "Now, the user attempts to verify the state of the repository again...")
-    cmd = "gittuf --verbose verify-ref main"
-    display_command(cmd)
-    run_command(cmd, 0)
-
-    print("... and finds that the issue has been fixed.")
+    run_scenario(SCENARIO, **options)
 
 if __name__ == "__main__":
     check_binaries(REQUIRED_BINARIES)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#          host.py - Runs many scenario invocations in a single process
+#
+#   Starting every experiment or benchmark as its own `python3` process pays
+#   for the interpreter, the imports and the binary lookups each time. This
+#   host does that once and then runs any number of invocations in-process.
+#   Scenarios pass their working directory and environment to each command
+#   through subprocess, so invocations do not leak state into each other.
+#
+################################################################################
+
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+import click
+
+import benchmark1
+import benchmark10
+import benchmark11
+import benchmark2
+import benchmark3
+import benchmark4
+import benchmark5
+import benchmark6
+import benchmark7
+import benchmark8
+import benchmark9
+import experiment1
+import experiment2
+import experiment3
+import experiment4
+from utils import SCRIPT_DIR, check_binaries, print_section, reset_state
+
+MODULES = [
+    experiment1, experiment2, experiment3, experiment4,
+    benchmark1, benchmark2, benchmark3, benchmark4, benchmark5, benchmark6, benchmark7,
+    benchmark8, benchmark9, benchmark10, benchmark11,
+]
+
+SCENARIOS = {module.__name__: getattr(module, module.__name__) for module in MODULES}
+
+# How often a standalone script's startup is sampled to estimate the savings
+STARTUP_SAMPLES = 3
+
+def standalone_startup(name):
+    """Measures how long a standalone script takes to start and exit"""
+    samples = []
+    for _ in range(STARTUP_SAMPLES):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, f"{name}.py", "--help"], cwd=SCRIPT_DIR,
+                       stdout=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def run_invocation(invocation):
+    """Runs a single invocation such as "experiment3 --automatic" in-process"""
+    args = shlex.split(invocation)
+    if not args or args[0] not in SCENARIOS:
+        raise Exception(f"Unknown scenario in `{invocation}`.")
+    SCENARIOS[args[0]].main(args[1:], prog_name=args[0], standalone_mode=False)
+
+@click.command()
+@click.option(
+    "--invocations-file", default="",
+    help="Optional file with one invocation per line, in addition to the arguments."
+)
+@click.option(
+    "--repeat", default=1, type=int,
+    help="How many times to run the whole list of invocations."
+)
+@click.option(
+    "--keep-going", default=False, type=bool, is_flag=True,
+    help="Whether to continue with the next invocation after one fails."
+)
+@click.argument("invocations", nargs=-1)
+def host(invocations_file, repeat, keep_going, invocations):
+    """Runs INVOCATIONS, e.g. "experiment3 --automatic", in a single process"""
+
+    invocations = list(invocations)
+    if invocations_file != "":
+        with open(invocations_file, encoding="utf-8") as fp:
+            invocations += [l.strip() for l in fp if l.strip() and not l.startswith("#")]
+
+    results = []
+    for _ in range(repeat):
+        for invocation in invocations:
+            print_section(f"[{len(results) + 1} / {len(invocations) * repeat}] {invocation}")
+            start = time.perf_counter()
+            status = "ok"
+            try:
+                run_invocation(invocation)
+            except Exception as e: # pylint: disable=broad-except
+                status = "failed"
+                print(f"\n{invocation} failed: {e}")
+                if not keep_going:
+                    raise
+            finally:
+                reset_state()
+            results.append((invocation, status, time.perf_counter() - start))
+
+    print_section("Host Summary")
+    for invocation, status, seconds in results:
+        print(f"{seconds:10.3f}s  {status:6}  {invocation}")
+
+    # Run standalone, every invocation would pay for its own interpreter
+    # startup, imports and binary lookups, while the host pays for them once
+    startup = {}
+    for invocation, _, _ in results:
+        name = shlex.split(invocation)[0]
+        if name not in startup:
+            startup[name] = standalone_startup(name)
+    host_startup = standalone_startup("host")
+    saved = sum(startup[shlex.split(i)[0]] for i, _, _ in results) - host_startup
+    print(f"\nHost startup: {host_startup:.3f}s")
+    for name, seconds in sorted(startup.items()):
+        print(f"Standalone startup of {name}: {seconds:.3f}s")
+    print(f"Estimated startup time saved over {len(results)} invocations: {saved:.3f}s")
+
+    if any(status != "ok" for _, status, _ in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    check_binaries(sorted({b for module in MODULES for b in module.REQUIRED_BINARIES}))
+    host() # pylint: disable=no-value-for-parameter
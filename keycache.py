@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#          keycache.py - Provisions SSH signing keys for the scenarios
+#
+#   Keys are generated once, in parallel, and kept in an on-disk cache keyed
+#   by algorithm and index, so later runs only link them into their
+#   workspace. The demo identities in keys/ are kept in the same cache with
+#   the permissions ssh-keygen requires, so the checkout is never modified.
+#
+################################################################################
+
+import errno
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+import click
+
+# The demo identities are ECDSA keys, so generated keys match them by default
+ALGORITHMS = {
+    "ecdsa": ["-t", "ecdsa", "-b", "256"],
+    "ed25519": ["-t", "ed25519"],
+    "rsa": ["-t", "rsa", "-b", "3072"],
+}
+
+DEFAULT_CACHE = os.environ.get("GITTUF_EVALUATION_KEY_CACHE") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "gittuf-evaluation", "keys",
+)
+
+DEMO_KEYS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "keys")
+
+def key_path(cache_dir, algorithm, index):
+    """Returns the path of a cached private key, its public key has .pub added"""
+    # Each key pair has a directory of its own, so both halves appear at once
+    return os.path.join(cache_dir, algorithm, f"signer{index}", "key")
+
+def generate_key(cache_dir, algorithm, index):
+    """Generates a key pair into the cache unless it is already there"""
+    path = key_path(cache_dir, algorithm, index)
+    if os.path.exists(path):
+        return path
+    # Generate into a private directory and rename it into place, so
+    # concurrent runs never see half a key pair
+    tmp_dir = os.path.join(cache_dir, algorithm, f".tmp-{os.getpid()}-{time.monotonic_ns()}")
+    os.mkdir(tmp_dir, mode=0o700)
+    try:
+        subprocess.run(
+            ["ssh-keygen", "-q", "-N", "", "-C", f"signer{index}", "-f",
+             os.path.join(tmp_dir, os.path.basename(path))] + ALGORITHMS[algorithm],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True,
+        )
+        os.rename(tmp_dir, os.path.dirname(path))
+    except OSError as e:
+        # Another run renamed its key pair into place first
+        if e.errno not in (errno.EEXIST, errno.ENOTEMPTY) or not os.path.exists(path):
+            raise
+    finally:
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+    return path
+
+def ensure_keys(count, algorithm="ecdsa", cache_dir=DEFAULT_CACHE, jobs=None):
+    """Makes sure keys 0 to count - 1 exist in the cache and returns their paths
+
+    Missing keys are generated by up to jobs ssh-keygen processes at a time.
+    """
+    if algorithm not in ALGORITHMS:
+        raise Exception(f"Unsupported key algorithm {algorithm}.")
+    os.makedirs(os.path.join(cache_dir, algorithm), mode=0o700, exist_ok=True)
+    missing = [i for i in range(count) if not os.path.exists(key_path(cache_dir, algorithm, i))]
+    if missing:
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            list(pool.map(lambda i: generate_key(cache_dir, algorithm, i), missing))
+    return [key_path(cache_dir, algorithm, i) for i in range(count)]
+
+def cache_demo_keys(cache_dir=DEFAULT_CACHE):
+    """Copies the demo identities into the cache, readable only by the owner"""
+    demo_dir = os.path.join(cache_dir, "demo")
+    os.makedirs(demo_dir, mode=0o700, exist_ok=True)
+    for name in os.listdir(DEMO_KEYS):
+        src = os.path.join(DEMO_KEYS, name)
+        dst = os.path.join(demo_dir, name)
+        if os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src):
+            continue
+        tmp = f"{dst}.tmp-{os.getpid()}"
+        shutil.copy2(src, tmp)
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, dst)
+    return demo_dir
+
+def link_key(src, dst):
+    """Hard links a cached key into a workspace, or symlinks it across filesystems
+
+    A workspace that already links the same key, e.g. one that is reused, is
+    left as it is.
+    """
+    try:
+        try:
+            os.link(src, dst)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            os.symlink(src, dst)
+    except FileExistsError:
+        if not os.path.samefile(src, dst):
+            raise
+
+def provision_demo_keys(keys_dir, cache_dir=DEFAULT_CACHE):
+    """Links the demo identities, e.g. root and developer1, into keys_dir"""
+    demo_dir = cache_demo_keys(cache_dir)
+    os.makedirs(keys_dir, exist_ok=True)
+    for name in os.listdir(demo_dir):
+        link_key(os.path.join(demo_dir, name), os.path.join(keys_dir, name))
+
+def provision_keys(keys_dir, count, algorithm="ecdsa", cache_dir=DEFAULT_CACHE, jobs=None,
+                   prefix="signer"):
+    """Links count generated identities into keys_dir as signer0, signer1, ...
+
+    Returns the names of the keys, relative to keys_dir.
+    """
+    os.makedirs(keys_dir, exist_ok=True)
+    names = []
+    for index, path in enumerate(ensure_keys(count, algorithm, cache_dir, jobs)):
+        name = f"{prefix}{index}"
+        link_key(path, os.path.join(keys_dir, name))
+        link_key(f"{path}.pub", os.path.join(keys_dir, f"{name}.pub"))
+        names.append(name)
+    return names
+
+@click.command()
+@click.option(
+    "--count", default=100, type=int,
+    help="How many keys to make sure are in the cache."
+)
+@click.option(
+    "--algorithm", default="ecdsa", type=click.Choice(sorted(ALGORITHMS)),
+    help="The algorithm of the keys."
+)
+@click.option(
+    "--cache-directory", default=DEFAULT_CACHE,
+    help="Where keys are cached, also settable with GITTUF_EVALUATION_KEY_CACHE."
+)
+@click.option(
+    "--jobs", default=os.cpu_count(), type=int,
+    help="How many ssh-keygen processes run at the same time."
+)
+def keycache(count, algorithm, cache_directory, jobs):
+    """Fills the key cache ahead of scenarios with many signers"""
+    start = time.perf_counter()
+    ensure_keys(count, algorithm, cache_directory, jobs)
+    print(f"{count} {algorithm} keys ready in {os.path.join(cache_directory, algorithm)} "
+          f"after {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    keycache() # pylint: disable=no-value-for-parameter
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#          results.py - Local database of benchmark and trace results
+#
+#   Every run is stored with the scenario it ran, its parameters, the host and
+#   the gittuf and git versions it used. Its results are stored in long form,
+#   one row per metric, labelled with the columns that identify the
+#   measurement (e.g. the RSL length), so runs of the same scenario can be
+#   compared across binary upgrades with plain SQL or the commands below.
+#
+################################################################################
+
+import html
+import json
+import platform
+import sqlite3
+import subprocess
+import time
+import click
+
+from bench import print_table
+
+DEFAULT_DATABASE = "results.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    scenario TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    started REAL NOT NULL,
+    host TEXT NOT NULL,
+    gittuf_version TEXT NOT NULL,
+    git_version TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    labels TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_scenario ON runs (scenario, started);
+CREATE INDEX IF NOT EXISTS measurements_by_run ON measurements (run_id);
+"""
+
+def open_database(path):
+    """Opens the results database, creating its tables if needed"""
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    db.executescript(SCHEMA)
+    return db
+
+def tool_version(cmd):
+    """Returns the first line a version command prints, or "unknown" """
+    try:
+        output = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    lines = output.decode("utf-8", errors="replace").strip().splitlines()
+    return lines[0] if lines else "unknown"
+
+def record_run(path, scenario, parameters, rows, labels, started=None):
+    """Appends a run and its result rows to the database and returns its id
+
+    labels are the columns identifying each row. Every other numeric column of
+    a row is stored as a metric.
+    """
+    db = open_database(path)
+    with db:
+        cursor = db.execute(
+            "INSERT INTO runs (scenario, parameters, started, host, gittuf_version, git_version)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                scenario, json.dumps(parameters, sort_keys=True),
+                started if started is not None else time.time(), platform.node(),
+                tool_version(["gittuf", "version"]), tool_version(["git", "--version"]),
+            ),
+        )
+        run_id = cursor.lastrowid
+        for row in rows:
+            key = json.dumps({c: row[c] for c in labels}, sort_keys=True)
+            db.executemany(
+                "INSERT INTO measurements (run_id, labels, metric, value) VALUES (?, ?, ?, ?)",
+                [
+                    (run_id, key, metric, value) for metric, value in row.items()
+                    if metric not in labels and isinstance(value, (int, float))
+                    and not isinstance(value, bool)
+                ],
+            )
+    db.close()
+    return run_id
+
+def record_trace(path, scenario, parameters, trace_directory):
+    """Appends the commands of a step trace as a run and returns its id
+
+    Commands are labelled by their section, step and position in the step
+    rather than by their text, which holds temporary paths and captured
+    values, or by their position in the trace, which concurrent steps shuffle.
+    """
+    rows = []
+    counts = {}
+    with open(f"{trace_directory}/steps.jsonl", encoding="utf-8") as fp:
+        for line in fp:
+            event = json.loads(line)
+            step = (event["section"], event["step"])
+            counts[step] = counts.get(step, 0) + 1
+            rows.append({
+                "section": event["section"],
+                "step": event["step"],
+                "index": counts[step],
+                "seconds": event["seconds"],
+            })
+    return record_run(path, scenario, parameters, rows, ["section", "step", "index"])
+
+def _measurements(db, run_id):
+    values = {}
+    for row in db.execute(
+        "SELECT labels, metric, value FROM measurements WHERE run_id = ? ORDER BY rowid",
+        (run_id,),
+    ):
+        values[(row["labels"], row["metric"])] = row["value"]
+    return values
+
+def _run(db, run_id):
+    run = db.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+    if run is None:
+        raise click.ClickException(f"No run {run_id} in the database.")
+    return run
+
+def _describe(run):
+    started = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["started"]))
+    return f"#{run['id']} {run['scenario']} {started} on {run['host']}, {run['gittuf_version']}"
+
+def _label_text(labels):
+    return " ".join(f"{k}={v}" for k, v in json.loads(labels).items())
+
+def trend_rows(db, scenario, metric, limit):
+    """Returns a table of a metric with one column per run, oldest first"""
+    runs = db.execute(
+        "SELECT * FROM runs WHERE scenario = ? ORDER BY started DESC LIMIT ?", (scenario, limit)
+    ).fetchall()[::-1]
+    columns = ["labels"] + [f"#{run['id']}" for run in runs]
+    table = {}
+    for run in runs:
+        for row in db.execute(
+            "SELECT labels, value FROM measurements WHERE run_id = ? AND metric = ? ORDER BY rowid",
+            (run["id"], metric),
+        ):
+            entry = table.setdefault(row["labels"], {c: "" for c in columns})
+            entry["labels"] = _label_text(row["labels"])
+            entry[f"#{run['id']}"] = row["value"]
+    return runs, columns, list(table.values())
+
+@click.group()
+@click.option(
+    "--database", default=DEFAULT_DATABASE,
+    help="Path of the SQLite results database."
+)
+@click.pass_context
+def results(ctx, database):
+    """Queries the results recorded by the benchmarks and traced scenarios"""
+    ctx.obj = open_database(database)
+
+@results.command()
+@click.option("--scenario", default="", help="Only list runs of this scenario.")
+@click.option("--limit", default=20, type=int, help="How many of the latest runs to list.")
+@click.pass_obj
+def runs(db, scenario, limit):
+    """Lists the recorded runs, latest first"""
+    query = "SELECT * FROM runs"
+    args = []
+    if scenario != "":
+        query += " WHERE scenario = ?"
+        args.append(scenario)
+    rows = [dict(r) for r in db.execute(query + " ORDER BY started DESC LIMIT ?", args + [limit])]
+    for row in rows:
+        row["started"] = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["started"]))
+    print_table(["id", "scenario", "started", "host", "gittuf_version", "git_version",
+                 "parameters"], rows)
+
+@results.command()
+@click.argument("run_id", type=int)
+@click.pass_obj
+def show(db, run_id):
+    """Prints every measurement of a run"""
+    print(_describe(_run(db, run_id)))
+    rows = [
+        {"labels": _label_text(labels), "metric": metric, "value": value}
+        for (labels, metric), value in _measurements(db, run_id).items()
+    ]
+    print_table(["labels", "metric", "value"], rows)
+
+@results.command()
+@click.argument("base_id", type=int)
+@click.argument("other_id", type=int)
+@click.option("--metric", default="", help="Only compare this metric.")
+@click.pass_obj
+def compare(db, base_id, other_id, metric):
+    """Compares the measurements two runs have in common"""
+    print(f"base:  {_describe(_run(db, base_id))}")
+    print(f"other: {_describe(_run(db, other_id))}\n")
+    base = _measurements(db, base_id)
+    other = _measurements(db, other_id)
+    rows = []
+    for key, value in base.items():
+        if key not in other or (metric != "" and key[1] != metric):
+            continue
+        change = (other[key] - value) / value * 100 if value else float("nan")
+        rows.append({
+            "labels": _label_text(key[0]), "metric": key[1],
+            "base": value, "other": other[key], "change_pct": change,
+        })
+    print_table(["labels", "metric", "base", "other", "change_pct"], rows)
+
+@results.command()
+@click.argument("scenario")
+@click.argument("metric")
+@click.option("--limit", default=10, type=int, help="How many of the latest runs to include.")
+@click.pass_obj
+def trend(db, scenario, metric, limit):
+    """Prints a metric of a scenario across its latest runs"""
+    runs_, columns, rows = trend_rows(db, scenario, metric, limit)
+    for run in runs_:
+        print(_describe(run))
+    print()
+    print_table(columns, rows)
+
+@results.command()
+@click.option("--output", default="report.html", help="Path of the HTML file to write.")
+@click.option("--limit", default=10, type=int, help="How many of the latest runs to include.")
+@click.pass_obj
+def report(db, output, limit):
+    """Writes a static HTML report with the trend of every metric"""
+    parts = ["<!DOCTYPE html><html><head><meta charset='utf-8'><title>gittuf results</title>"
+             "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+             "td,th{border:1px solid #ccc;padding:2px 6px;text-align:right}</style></head><body>",
+             "<h1>gittuf results</h1>"]
+    for (scenario,) in db.execute("SELECT DISTINCT scenario FROM runs ORDER BY scenario"):
+        parts.append(f"<h2>{html.escape(scenario)}</h2>")
+        metrics = db.execute(
+            "SELECT DISTINCT metric FROM measurements JOIN runs ON runs.id = run_id"
+            " WHERE scenario = ? ORDER BY metric", (scenario,),
+        ).fetchall()
+        for (metric,) in metrics:
+            runs_, columns, rows = trend_rows(db, scenario, metric, limit)
+            titles = {f"#{run['id']}": _describe(run) for run in runs_}
+            parts.append(f"<h3>{html.escape(metric)}</h3><table><tr>")
+            parts += [f"<th title='{html.escape(titles.get(c, ''))}'>{html.escape(c)}</th>"
+                      for c in columns]
+            parts.append("</tr>")
+            for row in rows:
+                cells = [f"{v:.4f}" if isinstance(v, float) else str(v) for v in row.values()]
+                parts.append("<tr>" + "".join(f"<td>{html.escape(c)}</td>" for c in cells)
+                             + "</tr>")
+            parts.append("</table>")
+    parts.append("</body></html>")
+    with open(output, "w", encoding="utf-8") as fp:
+        fp.write("\n".join(parts))
+    print(f"Report written to {output}")
+
+if __name__ == "__main__":
+    results() # pylint: disable=no-value-for-parameter
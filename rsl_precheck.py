@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#       rsl_precheck.py - Lightweight RSL divergence check against a remote
+#
+#   Fetches only the remote's RSL tip and uses ancestry queries to decide
+#   whether the local and remote RSLs have diverged, without a full
+#   `gittuf rsl remote pull` or any verification.
+#
+################################################################################
+
+import subprocess
+import sys
+import click
+
+RSL_REF = "refs/gittuf/reference-state-log"
+PRECHECK_REF_PREFIX = "refs/gittuf-precheck"
+
+UP_TO_DATE = "up-to-date"
+BEHIND = "behind"
+AHEAD = "ahead"
+DIVERGED = "diverged"
+
+def _git(args, cwd):
+    return subprocess.run(["git"] + args, cwd=cwd, stdout=subprocess.PIPE,
+                          stderr=subprocess.DEVNULL, check=False)
+
+def _is_ancestor(ancestor, descendant, cwd):
+    return _git(["merge-base", "--is-ancestor", ancestor, descendant], cwd).returncode == 0
+
+def local_rsl_tip(repo_dir):
+    """Returns the local RSL tip, or None if the repository has no RSL"""
+    proc = _git(["rev-parse", "--verify", "-q", RSL_REF], repo_dir)
+    if proc.returncode != 0:
+        return None
+    return proc.stdout.decode("utf-8").strip()
+
+def remote_rsl_tip(repo_dir, remote):
+    """Returns the remote's RSL tip as advertised, or None if it has no RSL"""
+    proc = _git(["ls-remote", remote, RSL_REF], repo_dir)
+    if proc.returncode != 0:
+        raise Exception(f"Unable to list references on remote {remote}.")
+    for line in proc.stdout.decode("utf-8").splitlines():
+        sha, ref = line.split("\t", 1)
+        if ref == RSL_REF:
+            return sha
+    return None
+
+def check_rsl_divergence(repo_dir, remote="origin"):
+    """Compares the local and remote RSLs using only the remote tip
+
+    Returns a (status, local_tip, remote_tip) tuple where status is one of
+    UP_TO_DATE, BEHIND (the remote fast-forwards the local RSL), AHEAD (the
+    local RSL fast-forwards the remote) or DIVERGED.
+    """
+    local_tip = local_rsl_tip(repo_dir)
+    remote_tip = remote_rsl_tip(repo_dir, remote)
+
+    if local_tip == remote_tip:
+        return UP_TO_DATE, local_tip, remote_tip
+    if remote_tip is None:
+        return AHEAD, local_tip, remote_tip
+
+    # Only fetch when the remote tip is unknown locally. The RSL is a chain of
+    # entry commits, so this transfers the missing entries and nothing else.
+    if _git(["cat-file", "-e", f"{remote_tip}^{{commit}}"], repo_dir).returncode != 0:
+        scratch_ref = f"{PRECHECK_REF_PREFIX}/{remote}/reference-state-log"
+        proc = _git(
+            ["fetch", "--no-tags", "--no-write-fetch-head", "-q", remote,
+             f"+{RSL_REF}:{scratch_ref}"],
+            repo_dir,
+        )
+        if proc.returncode != 0:
+            raise Exception(f"Unable to fetch the RSL tip from remote {remote}.")
+
+    if local_tip is None or _is_ancestor(local_tip, remote_tip, repo_dir):
+        return BEHIND, local_tip, remote_tip
+    if _is_ancestor(remote_tip, local_tip, repo_dir):
+        return AHEAD, local_tip, remote_tip
+    return DIVERGED, local_tip, remote_tip
+
+@click.command()
+@click.option(
+    "--repository-directory", default=".",
+    help="The path of the repository to check."
+)
+@click.argument("remote", default="origin")
+def rsl_precheck(repository_directory, remote):
+    """Checks whether the local RSL has diverged from REMOTE's RSL"""
+
+    status, local_tip, remote_tip = check_rsl_divergence(repository_directory, remote)
+    print(f"{status}: local {local_tip or '(none)'}, remote {remote_tip or '(none)'}")
+    if status == DIVERGED:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    rsl_precheck() # pylint: disable=no-value-for-parameter
@@ -0,0 +1,484 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#      scenario.py - Declarative scenario format and its DAG executor
+#
+#   A scenario is a dict with a "name" its results are recorded under, a
+#   "title", the "directories" to create in the working directory before it
+#   starts, the "clones" its steps create there, and a list of "sections".
+#   Each section has a "title" and a list of "steps", and each step is a dict
+#   with:
+#
+#     "id"        a unique name other steps can depend on (optional)
+#     "prompt"    the text shown before the step runs
+#     "repo"      the directory, relative to the working directory, that the
+#                 step's commands run in (defaults to the working directory)
+#     "commands"  the commands to run, see below
+#     "depends"   ids of the steps that must finish before this one starts;
+#                 without it, a step depends on the step declared before it
+#     "message"   text printed after the step succeeds (optional)
+#     "budget"    limits the step must stay within (optional), see below
+#
+#   A command is either a string, run with an expected exit code of 0, or a
+#   dict with one of these forms:
+#
+#     {"run": cmd, "expected": retcode}      runs cmd, expecting retcode
+#     {"capture": name, "run": cmd}          stores cmd's output as {name}
+#     {"write": path, "content": text}       writes text to path
+#     {"env": {name: value}}                 exports variables to later steps
+#
+#   Commands and paths may use the placeholders {working_dir}, {keys}, the
+#   name of any scenario directory or clone (e.g. {repo_a}) and any captured
+#   value. Braces around any other name are left as they are.
+#
+#   A budget is a dict with any of "seconds" (wall time of the step's
+#   commands), "max_rss_kb" (peak resident set size of any single command)
+#   and "gittuf_bytes" (growth of the objects reachable from refs/gittuf/* in
+#   the step's repository, as stored on disk). A step that exceeds its budget
+#   fails the run with a report of every exceeded limit. Budgets can also be
+#   given per step id in a JSON file, which takes precedence.
+#
+#   With a checkpoint directory, the workspace is snapshotted before every
+#   section and a later run can resume from any section, see checkpoint.py.
+#
+################################################################################
+
+import json
+import os
+import re
+import shlex
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import click
+
+from bench import print_table, time_verification_modes
+from checkpoint import read_manifest, restore_checkpoint, save_checkpoint
+from keycache import ALGORITHMS
+from results import record_run, record_trace
+from utils import (
+    command_args, display_command, finish_capture, finish_profiling, finish_trace,
+    gittuf_metadata_stats, prepare_workspace, print_section, prompt_key, run_command,
+    start_capture, start_profiling, start_trace,
+)
+
+def signing_commands(key, name="gittuf-demo"):
+    """Returns the git config commands that make a repository sign with key"""
+    return [
+        "git config --local gpg.format ssh",
+        "git config --local commit.gpgsign true",
+        f"git config --local user.signingkey {{keys}}/{key}",
+        f"git config --local user.name {name}",
+        "git config --local user.email gittuf.demo@example.com",
+    ]
+
+def scenario_options(func):
+    """Adds the options shared by every scenario script to a click command"""
+    options = [
+        click.option(
+            "--automatic", default=False, type=bool, is_flag=True,
+            help="Whether to wait for input before each command is run."
+        ),
+        click.option(
+            "--repository-directory", default="",
+            help="The path where the script should store the working copy of the repository."
+        ),
+        click.option(
+            "--signers", default=0, type=int,
+            help="How many generated identities to link into the workspace as signer0, signer1, ..."
+        ),
+        click.option(
+            "--key-algorithm", default="ecdsa", type=click.Choice(sorted(ALGORITHMS)),
+            help="The algorithm of the generated identities."
+        ),
+        click.option(
+            "--trace-directory", default="",
+            help="Optional path where the step trace and gittuf metadata growth are written."
+        ),
+        click.option(
+            "--profile", default=False, type=bool, is_flag=True,
+            help="Whether gittuf should write CPU and heap profiles next to the step trace."
+        ),
+        click.option(
+            "--profile-top", default=10, type=int,
+            help="How many of the hottest functions of each gittuf command to print."
+        ),
+        click.option(
+            "--jobs", default=1, type=int,
+            help="How many independent steps may run at once in automatic mode."
+        ),
+        click.option(
+            "--capture-directory", default="",
+            help="Optional path where command output is written instead of the terminal."
+        ),
+        click.option(
+            "--capture-spill-bytes", default=1024 * 1024, type=int,
+            help="How much output of each stream is kept in memory before spilling to disk."
+        ),
+        click.option(
+            "--capture-max-bytes", default=100 * 1024 * 1024, type=int,
+            help="How much output of each stream of a command is kept before the rest is dropped."
+        ),
+        click.option(
+            "--parse-events", default=False, type=bool, is_flag=True,
+            help="Whether to parse captured gittuf verbose output into structured events."
+        ),
+        click.option(
+            "--verify-timing", default=False, type=bool, is_flag=True,
+            help="Whether to also time every verify-ref cold, warm and with gittuf's cache."
+        ),
+        click.option(
+            "--verify-iterations", default=3, type=int,
+            help="How many times each verify-ref is timed in every mode of --verify-timing."
+        ),
+        click.option(
+            "--results-database", default="",
+            help="Optional path of a SQLite database to append the step trace to."
+        ),
+        click.option(
+            "--budgets-file", default="",
+            help="Optional JSON file mapping step ids to budgets, overriding the scenario's."
+        ),
+        click.option(
+            "--checkpoint-directory", default="",
+            help="Optional path where the workspace is snapshotted before every section."
+        ),
+        click.option(
+            "--resume-from", default="",
+            help="Restore the checkpoint of <section> and continue from <section>/<step>."
+        ),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+def plan_steps(scenario):
+    """Flattens the sections into steps annotated with their dependencies"""
+    steps = []
+    ids = set()
+    for section_index, section in enumerate(scenario["sections"]):
+        for step_index, step in enumerate(section["steps"]):
+            step_id = step.get("id", f"{section_index + 1}.{step_index + 1}")
+            if step_id in ids:
+                raise Exception(f"Duplicate step id {step_id}.")
+            if "depends" in step:
+                depends = list(step["depends"])
+            else:
+                depends = [steps[-1]["id"]] if steps else []
+            for dependency in depends:
+                # Dependencies must be declared earlier, which rules out cycles
+                if dependency not in ids:
+                    raise Exception(f"Step {step_id} depends on unknown step {dependency}.")
+            ids.add(step_id)
+            steps.append({
+                "id": step_id,
+                "section": section_index,
+                "heading": f"[{section_index + 1} / {len(scenario['sections'])}] "
+                           f"{section['title']}",
+                "number": step_index + 1,
+                "total": len(section["steps"]),
+                "depends": depends,
+                "step": step,
+            })
+    return steps
+
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+class _Context:
+    """Paths, environment and captured values shared by a scenario's steps"""
+
+    def __init__(self, working_dir, keys_dir, directories):
+        self.working_dir = working_dir
+        self.values = {"working_dir": working_dir, "keys": keys_dir}
+        for directory in directories:
+            self.values[directory] = os.path.join(working_dir, directory)
+        self.env = dict(os.environ)
+        self.exported = {}
+        self.budgets = {}
+        self.verify_iterations = 0
+        self.verify_timings = []
+        self.temporary = False
+        self.lock = threading.Lock()
+
+    def expand(self, text):
+        # Only known placeholders are replaced, so that braces git uses, as
+        # in HEAD@{1} or main^{tree}, are left alone
+        with self.lock:
+            return PLACEHOLDER.sub(lambda m: self.values.get(m.group(1), m.group(0)), text)
+
+    def cwd(self, step):
+        if "repo" in step:
+            return os.path.join(self.working_dir, step["repo"])
+        return self.working_dir
+
+def run_step(automatic, planned, context):
+    """Runs the commands of a single step"""
+    step = planned["step"]
+    cwd = context.cwd(step)
+    prompt_key(automatic, planned["number"], planned["total"], step["prompt"],
+               planned["heading"])
+
+    budget = context.budgets.get(planned["id"], step.get("budget"))
+    if budget:
+        gittuf_bytes = _gittuf_disk_bytes(cwd)
+    # Only the commands are charged to the budget, not prompts or displays
+    seconds = 0
+    max_rss_kb = 0
+    verifications = []
+
+    for command in step.get("commands", []):
+        if isinstance(command, str):
+            command = {"run": command}
+
+        if "write" in command:
+            path = context.expand(command["write"])
+            display_command(f"echo '{command['content'].rstrip()}' > {path}", cwd)
+            with open(os.path.join(cwd, path), "w", encoding="utf-8") as fp:
+                fp.write(command["content"])
+        elif "env" in command:
+            for name, value in command["env"].items():
+                display_command(f"export {name}={value}", cwd)
+                with context.lock:
+                    context.env[name] = value
+                    context.exported[name] = value
+        elif "capture" in command:
+            cmd = context.expand(command["run"])
+            display_command(cmd, cwd)
+            output = subprocess.check_output(command_args(cmd), cwd=cwd, env=context.env)
+            with context.lock:
+                context.values[command["capture"]] = output.decode("utf-8").strip()
+        else:
+            cmd = context.expand(command["run"])
+            display_command(cmd, cwd)
+            result = run_command(cmd, command.get("expected", 0), cwd=cwd, env=context.env)
+            seconds += result["seconds"]
+            max_rss_kb = max(max_rss_kb, result["max_rss_kb"])
+            if context.verify_iterations and "verify-ref" in shlex.split(cmd):
+                verifications.append((cmd, command.get("expected", 0)))
+
+    if budget:
+        check_budget(planned, budget, {
+            "seconds": seconds,
+            "max_rss_kb": max_rss_kb,
+            "gittuf_bytes": _gittuf_disk_bytes(cwd) - gittuf_bytes,
+        })
+
+    # Timed after the budget check, so the extra runs are not charged to it
+    for cmd, expected in verifications:
+        timing = time_verification_modes(cmd, cwd, expected, context.verify_iterations,
+                                         env=context.env)
+        cached = timing["cached_skipped"] or f"{timing['cached_s']:.4f}s"
+        print(f"  cold {timing['cold_s']:.4f}s, warm {timing['warm_s']:.4f}s, cached {cached}")
+        timing.update({"step": planned["id"], "command": cmd})
+        with context.lock:
+            context.verify_timings.append(timing)
+
+    if "message" in step:
+        print(step["message"])
+
+BUDGET_UNITS = {"seconds": "s", "max_rss_kb": " KiB", "gittuf_bytes": " bytes"}
+
+def check_budget(planned, budget, measured):
+    """Raises an exception reporting every limit of the budget that was exceeded"""
+    unknown = set(budget) - set(BUDGET_UNITS)
+    if unknown:
+        raise Exception(f"Unknown budget {', '.join(sorted(unknown))} in step {planned['id']}.")
+    exceeded = [name for name, limit in budget.items() if measured[name] > limit]
+    if not exceeded:
+        return
+    lines = [f"Step {planned['id']} ({planned['step']['prompt']}) exceeded its budget:"]
+    for name in exceeded:
+        unit = BUDGET_UNITS[name]
+        value = measured[name]
+        value = f"{value:.3f}" if isinstance(value, float) else value
+        lines.append(f"  {name}: {value}{unit} > {budget[name]}{unit}")
+    raise Exception("\n".join(lines))
+
+def _gittuf_disk_bytes(repo_dir):
+    if not os.path.isdir(repo_dir):
+        return 0
+    return sum(stats["disk_bytes"] for stats in gittuf_metadata_stats(repo_dir))
+
+def parse_resume_point(value):
+    """Parses a --resume-from value such as "3" or "3/5" into 1-based numbers"""
+    section, _, step = value.partition("/")
+    try:
+        return int(section), int(step or 1)
+    except ValueError:
+        raise click.BadParameter(
+            f"expected <section> or <section>/<step>, got {value}", param_hint="--resume-from"
+        ) from None
+
+def run_scenario(scenario, automatic=True, repository_directory="", trace_directory="",
+                 profile=False, profile_top=10, jobs=1, capture_directory="",
+                 capture_spill_bytes=1024 * 1024, capture_max_bytes=100 * 1024 * 1024,
+                 parse_events=False,
+                 verify_timing=False, verify_iterations=3, results_database="",
+                 budgets_file="", checkpoint_directory="", resume_from="", signers=0,
+                 key_algorithm="ecdsa"):
+    """Prepares a workspace and runs every step of the scenario"""
+    print(scenario["title"])
+
+    steps = plan_steps(scenario)
+    sections = scenario["sections"]
+    resume_section, _ = parse_resume_point(resume_from) if resume_from else (1, 1)
+    if resume_from and checkpoint_directory == "":
+        raise click.BadParameter("requires --checkpoint-directory", param_hint="--resume-from")
+    if not 1 <= resume_section <= len(sections):
+        raise click.BadParameter(f"no section {resume_section}", param_hint="--resume-from")
+
+    # Profiles are kept next to the trace, so a temporary trace will not do
+    if profile and trace_directory == "":
+        raise click.BadParameter("requires --trace-directory", param_hint="--profile")
+    # Results are recorded from the step trace, so they need one
+    trace_tmp_dir = None
+    if results_database != "" and trace_directory == "":
+        trace_tmp_dir = tempfile.TemporaryDirectory()
+        trace_directory = trace_tmp_dir.name
+    if trace_directory != "":
+        start_trace(trace_directory)
+    if profile:
+        start_profiling(os.path.join(trace_directory, "profiles"))
+    if capture_directory != "":
+        start_capture(capture_directory, capture_spill_bytes, capture_max_bytes, parse_events)
+
+    directories = scenario.get("directories", [])
+    if resume_from:
+        # A temporary workspace is gone by now, so it is restored into a new one
+        tmp_dir = None
+        temporary = read_manifest(checkpoint_directory, resume_section).get("temporary")
+        if repository_directory == "" and temporary:
+            tmp_dir = tempfile.TemporaryDirectory()
+            repository_directory = tmp_dir.name
+        manifest = restore_checkpoint(checkpoint_directory, resume_section, repository_directory)
+        working_dir = manifest["working_dir"]
+        context = _Context(working_dir, os.path.join(working_dir, "keys"),
+                           directories + scenario.get("clones", []))
+        # Paths are rebuilt for the restored location, only captured values carry over
+        for name, value in manifest["values"].items():
+            context.values.setdefault(name, value)
+        context.exported.update(manifest["exported"])
+        context.env.update(manifest["exported"])
+        print(f"\nRestored {working_dir} from the checkpoint before section {resume_section}")
+    else:
+        working_dir, keys_dir, tmp_dir = prepare_workspace(repository_directory, signers,
+                                                           key_algorithm)
+        for directory in directories:
+            os.makedirs(os.path.join(working_dir, directory), exist_ok=True)
+        context = _Context(working_dir, keys_dir, directories + scenario.get("clones", []))
+    context.temporary = tmp_dir is not None
+
+    if budgets_file != "":
+        with open(budgets_file, encoding="utf-8") as fp:
+            context.budgets = json.load(fp)
+        unknown = set(context.budgets) - {p["id"] for p in steps}
+        if unknown:
+            raise Exception(f"Budgets for unknown steps {', '.join(sorted(unknown))}.")
+
+    if verify_timing:
+        context.verify_iterations = verify_iterations
+
+    printed = set()
+
+    def start_section(planned):
+        if planned["section"] not in printed:
+            printed.add(planned["section"])
+            print_section(planned["heading"])
+
+    try:
+        if checkpoint_directory == "":
+            _run_steps(steps, automatic, jobs, start_section, context, set())
+        else:
+            _run_sections(steps, sections, automatic, jobs, start_section, context,
+                          checkpoint_directory, resume_from)
+        if results_database != "":
+            run_id = record_trace(results_database, scenario["name"], {
+                "automatic": automatic,
+                "jobs": jobs,
+                "capture": capture_directory != "",
+                "resume_from": resume_from,
+            }, trace_directory)
+            print(f"\nResults recorded as run {run_id} in {results_database}")
+        if context.verify_timings:
+            report_verify_timings(scenario, context.verify_timings, verify_iterations,
+                                  results_database)
+    finally:
+        finish_capture()
+        finish_profiling(profile_top)
+        finish_trace(trace_tmp_dir is None)
+        if trace_tmp_dir is not None:
+            trace_tmp_dir.cleanup()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+VERIFY_TIMING_COLUMNS = ["step", "command", "cold_s", "warm_s", "cached_s"]
+
+def report_verify_timings(scenario, timings, iterations, results_database):
+    """Prints the cold, warm and cached verification times of a run"""
+    print_section("Verification Timing")
+    skipped = timings[0]["cached_skipped"]
+    rows = [dict(t, cached_s="skipped" if skipped else t["cached_s"]) for t in timings]
+    print_table(VERIFY_TIMING_COLUMNS, rows)
+    if skipped:
+        print(f"\nCached timings {skipped}")
+    if results_database != "":
+        # The skip reason is kept with the run, as there are no cached_s values
+        run_id = record_run(results_database, f"{scenario['name']}-verify-timing", {
+            "verify_iterations": iterations,
+            "cached": skipped or "measured",
+        }, timings, ["step", "command"])
+        print(f"\nResults recorded as run {run_id} in {results_database}")
+
+def _run_sections(steps, sections, automatic, jobs, start_section, context,
+                  checkpoint_directory, resume_from):
+    resume_section, resume_step = parse_resume_point(resume_from) if resume_from else (1, 1)
+    # Checkpoints are taken at section boundaries, so steps never overlap
+    # across sections in this mode
+    done = {p["id"] for p in steps if p["section"] < resume_section - 1}
+    for index in range(resume_section - 1, len(sections)):
+        section_steps = [p for p in steps if p["section"] == index]
+        if index == resume_section - 1 and resume_from:
+            # Only the section boundary was snapshotted, so the steps of
+            # the section before the resume point are replayed
+            replay = [p for p in section_steps if p["number"] < resume_step]
+            if replay:
+                print(f"Replaying steps 1-{len(replay)} of section {resume_section}")
+            _run_steps(replay, True, jobs, start_section, context, done)
+            section_steps = section_steps[len(replay):]
+        else:
+            save_checkpoint(checkpoint_directory, index + 1, context.working_dir, {
+                "values": context.values,
+                "exported": context.exported,
+                "temporary": context.temporary,
+            })
+        _run_steps(section_steps, automatic, jobs, start_section, context, done)
+
+def _run_steps(steps, automatic, jobs, start_section, context, done):
+    # Prompts need the terminal, so steps only overlap in automatic mode
+    if not automatic or jobs <= 1:
+        for planned in steps:
+            start_section(planned)
+            run_step(automatic, planned, context)
+            done.add(planned["id"])
+        return
+
+    pending = list(steps)
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for planned in [p for p in pending if all(d in done for d in p["depends"])]:
+                if len(running) >= jobs:
+                    break
+                pending.remove(planned)
+                start_section(planned)
+                running[pool.submit(run_step, automatic, planned, context)] = planned
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                planned = running.pop(future)
+                # Let already running steps finish, but start nothing new
+                if future.exception() is not None:
+                    wait(running)
+                    raise future.exception()
+                done.add(planned["id"])
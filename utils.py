@@ -6,19 +6,95 @@
 #
 ################################################################################
 
+import csv
+import json
 import os
+import re
 import shlex
 import shutil
 import subprocess
+import tempfile
+import threading
+import time
+
+from capture import parse_gittuf_events, run_captured, write_events
+from keycache import provision_demo_keys, provision_keys
+
+METADATA_COLUMNS = [
+    "time", "section", "step", "command", "repo", "ref",
+    "commits", "objects", "size_bytes", "disk_bytes",
+]
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# State of the optional step trace, enabled with start_trace. Steps of a
+# scenario may run concurrently, so the current step is tracked per thread.
+_trace = {
+    "directory": None,
+    "section": "",
+    "first": {},
+    "last": {},
+}
+_trace_step = threading.local()
+_trace_lock = threading.Lock()
+
+# Settings of the optional captured-output mode, enabled with start_capture
+_capture = {
+    "directory": None,
+    "spill_bytes": 0,
+    "max_bytes": 0,
+    "parse_events": False,
+    "steps": 0,
+}
+
+# State of the optional gittuf profiling mode, enabled with start_profiling.
+# Profiles are grouped by gittuf command, e.g. "rsl record".
+_profile = {
+    "directory": None,
+    "count": 0,
+    "profiles": {},
+}
+
+# gittuf commands that only group subcommands
+GITTUF_COMMAND_GROUPS = {"attest", "cache", "dev", "policy", "remote", "rsl", "trust"}
+
+# Absolute paths of the binaries found by check_binaries
+_binaries = {}
 
 def check_binaries(required_binaries):
-    """Checks that the supplied binaries are present on the system"""
+    """Checks that the supplied binaries are present on the system
+
+    Each binary is looked up on PATH only once per process, and commands run
+    afterwards use the resolved path.
+    """
     for p in required_binaries:
-        if not shutil.which(p):
+        if p in _binaries:
+            continue
+        path = shutil.which(p)
+        if not path:
             raise Exception(f"required command {p} not found")
+        _binaries[p] = path
+
+def command_args(cmd):
+    """Splits a command line, substituting the resolved path of its binary"""
+    args = shlex.split(cmd)
+    if args and args[0] in _binaries:
+        args[0] = _binaries[args[0]]
+    return args
 
-def prompt_key(auto, opnum, optotal, prompt):
-    """Controls the flow of the demo for each step"""
+def prompt_key(auto, opnum, optotal, prompt, section=None):
+    """Controls the flow of the demo for each step
+
+    section optionally names the step's section in the trace, for steps that
+    run while a later section has already started.
+    """
+    _trace_step.label = f"({opnum} / {optotal}) {prompt}"
+    _trace_step.section = section
+    if _capture["directory"] is not None:
+        with _trace_lock:
+            _capture["steps"] += 1
+            slug = re.sub(r"[^a-z0-9]+", "-", prompt.lower()).strip("-")[:60]
+            _trace_step.log = f"{_capture['steps']:04d}-{slug}"
     if auto:
         print(f"\n({opnum} / {optotal}): {prompt}")
         return opnum + 1
@@ -30,16 +106,296 @@ def prompt_key(auto, opnum, optotal, prompt):
         except Exception:
             pass
 
-def display_command(cmd):
-    """Displays the supplied command with the current directory prepended"""
-    print(f"[{os.getcwd()}] $ {cmd}")
+def display_command(cmd, cwd=None):
+    """Displays the supplied command with its working directory prepended"""
+    print(f"[{cwd or os.getcwd()}] $ {cmd}")
+
+def run_command(cmd, expected_retcode, cwd=None, env=None):
+    """Runs the supplied command and checks for the expected return code
 
-def run_command(cmd, expected_retcode):
-    """Runs the supplied command and checks for the expected return code"""
-    retcode = subprocess.call(shlex.split(cmd))
+    Returns the wall time, the peak resident set size in KiB and the exit code.
+    """
+    start = time.perf_counter()
+    args, profiles = profile_command(cmd, command_args(cmd))
+    if _capture["directory"] is None:
+        proc = subprocess.Popen(args, cwd=cwd, env=env)
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = retcode = os.waitstatus_to_exitcode(status)
+        max_rss_kb = rusage.ru_maxrss
+        stderr = ""
+    else:
+        retcode, stderr, max_rss_kb = _run_captured(cmd, args, cwd, env)
+    seconds = time.perf_counter() - start
+    if _trace["directory"] is not None:
+        _record_trace(cmd, cwd or os.getcwd(), retcode, seconds, profiles)
     if retcode != expected_retcode:
-        raise Exception(f"Expected {expected_retcode} from process but it exited with {retcode}.")
+        raise Exception(
+            f"Expected {expected_retcode} from process but it exited with {retcode}.{stderr}"
+        )
+    return {"seconds": seconds, "max_rss_kb": max_rss_kb, "retcode": retcode}
+
+def reset_state():
+    """Turns off tracing, capturing and profiling without reporting anything
+
+    Used between invocations in one process, so that one that failed before
+    it could finish them does not leave them on for the next.
+    """
+    _trace.update({"directory": None, "section": "", "first": {}, "last": {}})
+    _trace_step.__dict__.clear()
+    _capture["directory"] = None
+    _profile.update({"directory": None, "count": 0, "profiles": {}})
 
 def print_section(text):
     """Prints the needed amount of dashes for each section heading"""
+    _trace["section"] = text
     print('\n' + text + ' ' + ('-' * (80 - len(text))))
+
+def prepare_workspace(repository_directory, signers=0, algorithm="ecdsa"):
+    """Selects the working directory and links the demo keys into it
+
+    With signers, that many generated identities are also linked in as
+    signer0, signer1, ...
+    """
+    tmp_dir = None
+    if repository_directory == "":
+        tmp_dir = tempfile.TemporaryDirectory()
+        working_dir = tmp_dir.name
+    else:
+        working_dir = os.path.abspath(repository_directory)
+        os.makedirs(working_dir, exist_ok=True)
+
+    keys_dir = os.path.join(working_dir, "keys")
+    provision_demo_keys(keys_dir)
+    if signers:
+        provision_keys(keys_dir, signers, algorithm)
+
+    # The caller must hold on to tmp_dir for as long as the workspace is used
+    return working_dir, keys_dir, tmp_dir
+
+def gittuf_metadata_stats(repo_dir):
+    """Returns object counts and sizes for each ref under refs/gittuf/
+
+    Sizes are the uncompressed object sizes and the space the objects take on
+    disk, i.e. zlib-compressed loose objects or deltified packed objects.
+    """
+    proc = subprocess.run(
+        ["git", "for-each-ref", "--format=%(refname)", "refs/gittuf/"],
+        cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False,
+    )
+    if proc.returncode != 0:
+        return []
+
+    stats = []
+    for ref in proc.stdout.decode("utf-8").split():
+        commits = subprocess.check_output(
+            ["git", "rev-list", "--count", ref], cwd=repo_dir
+        ).decode("utf-8").strip()
+        objects = subprocess.check_output(["git", "rev-list", "--objects", ref], cwd=repo_dir)
+        oids = b"\n".join(line.split(b" ", 1)[0] for line in objects.splitlines())
+        sizes = subprocess.run(
+            ["git", "cat-file", "--batch-check=%(objectsize) %(objectsize:disk)"],
+            cwd=repo_dir, input=oids + b"\n", stdout=subprocess.PIPE, check=True,
+        ).stdout.decode("utf-8").split()
+        stats.append({
+            "ref": ref,
+            "commits": int(commits),
+            "objects": len(sizes) // 2,
+            "size_bytes": sum(int(v) for v in sizes[0::2]),
+            "disk_bytes": sum(int(v) for v in sizes[1::2]),
+        })
+    return stats
+
+def start_trace(trace_directory):
+    """Starts recording every command and the growth of gittuf metadata
+
+    Each command is appended to steps.jsonl. After each command, the size of
+    every refs/gittuf/* ref in the current repository is appended to
+    metadata.csv, producing a time series that lines up with the step trace.
+    """
+    trace_directory = os.path.abspath(trace_directory)
+    os.makedirs(trace_directory, exist_ok=True)
+    with open(os.path.join(trace_directory, "metadata.csv"), "w", encoding="utf-8",
+              newline="") as fp:
+        csv.DictWriter(fp, fieldnames=METADATA_COLUMNS).writeheader()
+    open(os.path.join(trace_directory, "steps.jsonl"), "w", encoding="utf-8").close()
+    _trace["directory"] = trace_directory
+    _trace["first"] = {}
+    _trace["last"] = {}
+
+def finish_trace(report_directory=True):
+    """Prints how much each gittuf ref grew over the traced run
+
+    report_directory is False for a trace directory that is removed
+    afterwards, so it is not printed.
+    """
+    if _trace["directory"] is None:
+        return
+    print_section("gittuf Metadata Growth")
+    for key, last in sorted(_trace["last"].items()):
+        first = _trace["first"][key]
+        print(
+            f"{last['repo']} {last['ref']}: {last['commits']} commits "
+            f"(+{last['commits'] - first['commits']}), {last['objects']} objects "
+            f"(+{last['objects'] - first['objects']}), {last['size_bytes']} bytes "
+            f"uncompressed, {last['disk_bytes']} bytes on disk"
+        )
+    if report_directory:
+        print(f"\nTrace written to {_trace['directory']}")
+    _trace["directory"] = None
+    _trace_step.__dict__.clear()
+
+def start_capture(capture_directory, spill_bytes, max_bytes, parse_events):
+    """Sends the output of every command to per-step log files
+
+    Output is held in memory up to spill_bytes per stream before it is
+    written to disk, and anything past max_bytes per stream of a single
+    command is dropped. With parse_events, gittuf's verbose log lines are
+    also written as structured events to a .events.jsonl file next to the
+    logs.
+    """
+    capture_directory = os.path.abspath(capture_directory)
+    os.makedirs(capture_directory, exist_ok=True)
+    _capture.update({
+        "directory": capture_directory,
+        "spill_bytes": spill_bytes,
+        "max_bytes": max_bytes,
+        "parse_events": parse_events,
+        "steps": 0,
+    })
+
+def finish_capture():
+    """Returns to letting commands write to the terminal"""
+    if _capture["directory"] is not None:
+        print(f"\nCommand output written to {_capture['directory']}")
+        _capture["directory"] = None
+
+def gittuf_command_type(args):
+    """Returns the gittuf command an argument list runs, e.g. "rsl remote pull" """
+    words = []
+    for arg in args[1:]:
+        if arg.startswith("-"):
+            if words:
+                break
+            continue
+        words.append(arg)
+        if arg not in GITTUF_COMMAND_GROUPS:
+            break
+    return " ".join(words) or "gittuf"
+
+def gittuf_supports_profiling():
+    """Returns whether the gittuf binary can write CPU and heap profiles"""
+    if "profiling" not in _profile:
+        proc = subprocess.run(command_args("gittuf --help"), stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, check=False)
+        _profile["profiling"] = b"--profile-CPU-file" in proc.stdout
+    return _profile["profiling"]
+
+def start_profiling(profile_directory):
+    """Makes every gittuf command write CPU and heap profiles
+
+    Profiles are written to profile_directory as NNNN-<command>.cpu.prof and
+    NNNN-<command>.memory.prof, using gittuf's --profile flags.
+    """
+    if not gittuf_supports_profiling():
+        raise Exception("This gittuf binary has no --profile flags, profiles cannot be written.")
+    profile_directory = os.path.abspath(profile_directory)
+    os.makedirs(profile_directory, exist_ok=True)
+    _profile.update({"directory": profile_directory, "count": 0, "profiles": {}})
+
+def profile_command(cmd, args):
+    """Adds gittuf's profile flags to the arguments of a gittuf command
+
+    Returns the arguments and the profile paths, or None for other commands
+    and when profiling is not started.
+    """
+    if _profile["directory"] is None or shlex.split(cmd)[0] != "gittuf":
+        return args, None
+    return _profiled_args(args)
+
+def finish_profiling(top):
+    """Merges the profiles of each gittuf command and prints its hottest functions"""
+    if _profile["directory"] is None:
+        return
+    directory = _profile["directory"]
+    _profile["directory"] = None
+    print_section("gittuf Profiles")
+    go = shutil.which("go")
+    for command, profiles in sorted(_profile["profiles"].items()):
+        slug = re.sub(r"[^a-z0-9]+", "-", command.lower()).strip("-")
+        print(f"\n{command}: {len(profiles)} runs")
+        for kind in ["cpu", "memory"]:
+            paths = [p[kind] for p in profiles if os.path.exists(p[kind])]
+            if not paths or go is None:
+                continue
+            merged = os.path.join(directory, f"merged-{slug}.{kind}.pb.gz")
+            subprocess.run([go, "tool", "pprof", "-proto", "-output", merged] + paths,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+            if not os.path.exists(merged):
+                print(f"  could not merge the {kind} profiles")
+                continue
+            proc = subprocess.run([go, "tool", "pprof", "-top", f"-nodecount={top}", merged],
+                                  stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False)
+            print(f"  {kind} profile {merged}:")
+            lines = proc.stdout.decode("utf-8", errors="replace").splitlines()
+            # Skip the header pprof prints before the table
+            header = [i for i, l in enumerate(lines) if l.strip().startswith("flat")]
+            for line in lines[header[0]:header[0] + top + 1] if header else []:
+                print(f"    {line}")
+    if go is None:
+        print("\ngo is not installed, so the profiles were not merged or summarized")
+    print(f"\nProfiles written to {directory}")
+
+def _profiled_args(args):
+    command = gittuf_command_type(args)
+    with _trace_lock:
+        _profile["count"] += 1
+        slug = re.sub(r"[^a-z0-9]+", "-", command.lower()).strip("-")
+        base = os.path.join(_profile["directory"], f"{_profile['count']:04d}-{slug}")
+        profiles = {"cpu": f"{base}.cpu.prof", "memory": f"{base}.memory.prof"}
+        _profile["profiles"].setdefault(command, []).append(profiles)
+    flags = ["--profile", "--profile-CPU-file", profiles["cpu"],
+             "--profile-memory-file", profiles["memory"]]
+    return args[:1] + flags + args[1:], profiles
+
+def _run_captured(cmd, args, cwd, env):
+    log_base = os.path.join(_capture["directory"], getattr(_trace_step, "log", "0000-setup"))
+    stderr_log = f"{log_base}.stderr.log"
+    offset = os.path.getsize(stderr_log) if os.path.exists(stderr_log) else 0
+    retcode, stderr, max_rss_kb = run_captured(args, cwd, env, log_base,
+                                               _capture["spill_bytes"], _capture["max_bytes"])
+    if _capture["parse_events"] and shlex.split(cmd)[0] == "gittuf":
+        events = parse_gittuf_events(stderr_log, cmd, offset)
+        with _trace_lock:
+            write_events(events, f"{log_base}.events.jsonl")
+    return retcode, f"\n{stderr.tail()}", max_rss_kb
+
+def _record_trace(cmd, cwd, retcode, seconds, profiles=None):
+    event = {
+        "time": time.time(),
+        "section": getattr(_trace_step, "section", None) or _trace["section"],
+        "step": getattr(_trace_step, "label", ""),
+        "cwd": cwd,
+        "command": cmd,
+        "retcode": retcode,
+        "seconds": seconds,
+    }
+    if profiles is not None:
+        event["profiles"] = profiles
+    rows = []
+    for stats in gittuf_metadata_stats(cwd):
+        row = {key: event[key] for key in ("time", "section", "step", "command")}
+        row["repo"] = cwd
+        row.update(stats)
+        rows.append(row)
+
+    with _trace_lock:
+        with open(os.path.join(_trace["directory"], "steps.jsonl"), "a",
+                  encoding="utf-8") as fp:
+            fp.write(json.dumps(event) + "\n")
+        with open(os.path.join(_trace["directory"], "metadata.csv"), "a", encoding="utf-8",
+                  newline="") as fp:
+            csv.DictWriter(fp, fieldnames=METADATA_COLUMNS).writerows(rows)
+        for row in rows:
+            key = (row["repo"], row["ref"])
+            _trace["first"].setdefault(key, row)
+            _trace["last"][key] = row